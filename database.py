@@ -1,12 +1,60 @@
 # pip install sqlalchemy
 import sqlite3
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import create_engine, bindparam, event as sa_event, text, Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
 Base = declarative_base()
 
+# Bulk form of add_or_update_event: the same column rules, applied by one executemany.
+# Enrichment fields and description keep their stored value when the new one is NULL.
+EVENTS_UPSERT_SQL = text("""
+    INSERT INTO events (
+        id, slug, title, description, domain, section, subsection, section_tag_id,
+        subsection_tag_id, is_active, volume, last_trade_date, outcome_prices,
+        last_trade_price, best_bid, best_ask, liquidity, liquidity_num, liquidity_clob,
+        open_interest, created_at, updated_at, last_synced
+    ) VALUES (
+        :id, :slug, :title, :description, :domain, :section, :subsection, :section_tag_id,
+        :subsection_tag_id, 1, COALESCE(:volume, 0), :last_trade_date, :outcome_prices,
+        :last_trade_price, :best_bid, :best_ask, :liquidity, :liquidity_num, :liquidity_clob,
+        :open_interest, :now, :now, :now
+    )
+    ON CONFLICT(id) DO UPDATE SET
+        slug = excluded.slug,
+        title = excluded.title,
+        description = COALESCE(excluded.description, events.description),
+        domain = excluded.domain,
+        section = excluded.section,
+        subsection = excluded.subsection,
+        section_tag_id = excluded.section_tag_id,
+        subsection_tag_id = excluded.subsection_tag_id,
+        is_active = 1,
+        volume = COALESCE(:volume, events.volume),
+        last_trade_date = COALESCE(excluded.last_trade_date, events.last_trade_date),
+        outcome_prices = COALESCE(excluded.outcome_prices, events.outcome_prices),
+        last_trade_price = COALESCE(excluded.last_trade_price, events.last_trade_price),
+        best_bid = COALESCE(excluded.best_bid, events.best_bid),
+        best_ask = COALESCE(excluded.best_ask, events.best_ask),
+        liquidity = COALESCE(excluded.liquidity, events.liquidity),
+        liquidity_num = COALESCE(excluded.liquidity_num, events.liquidity_num),
+        liquidity_clob = COALESCE(excluded.liquidity_clob, events.liquidity_clob),
+        open_interest = COALESCE(excluded.open_interest, events.open_interest),
+        updated_at = excluded.updated_at,
+        last_synced = excluded.last_synced
+""").bindparams(bindparam('now', type_=DateTime))
+
+# Scratch table holding the ids the latest listing returned, one per connection.
+ACTIVE_IDS_TABLE_SQL = text("CREATE TEMP TABLE IF NOT EXISTS active_event_ids (id TEXT PRIMARY KEY)")
+ACTIVE_IDS_CLEAR_SQL = text("DELETE FROM active_event_ids")
+ACTIVE_IDS_INSERT_SQL = text("INSERT OR IGNORE INTO active_event_ids (id) VALUES (:id)")
+
+MARK_INACTIVE_SQL = text("""
+    UPDATE events SET is_active = 0, updated_at = :now
+    WHERE is_active = 1 AND id NOT IN (SELECT id FROM active_event_ids)
+""").bindparams(bindparam('now', type_=DateTime))
+
 class Event(Base):
     __tablename__ = 'events'
 
@@ -47,14 +95,36 @@ class Tag(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Database:
-    def __init__(self, db_path='polymarket.db'):
-        self.engine = create_engine(f'sqlite:///{db_path}')
+    def __init__(self, db_path='polymarket.db', synchronous='NORMAL'):
+        """Open the database.
+
+        synchronous is the PRAGMA synchronous level. NORMAL under WAL may lose the last
+        commits on power loss, which a cache refreshed every few seconds can afford; pass
+        'FULL' for the SQLite default durability.
+        """
+        # A larger sqlite3 statement cache keeps the ORM's and the bulk statements prepared.
+        self.engine = create_engine(f'sqlite:///{db_path}', connect_args={'cached_statements': 256})
+
+        @sa_event.listens_for(self.engine, 'connect')
+        def _set_pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute(f'PRAGMA synchronous={synchronous}')
+            cursor.execute('PRAGMA mmap_size=268435456')
+            cursor.execute('PRAGMA cache_size=-131072')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.execute('PRAGMA busy_timeout=5000')
+            cursor.close()
+
         Base.metadata.create_all(self.engine)
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
 
-    def add_or_update_event(self, event_id, slug, title, domain, section, subsection, section_tag_id=None, subsection_tag_id=None, volume=None, last_trade_date=None, outcome_prices=None, last_trade_price=None, best_bid=None, best_ask=None, liquidity=None, liquidity_num=None, liquidity_clob=None, open_interest=None, description=None):
-        """Add new event or update existing event with domain, section, subsection, description, and enrichment fields."""
+    def add_or_update_event(self, event_id, slug, title, domain, section, subsection, section_tag_id=None, subsection_tag_id=None, volume=None, last_trade_date=None, outcome_prices=None, last_trade_price=None, best_bid=None, best_ask=None, liquidity=None, liquidity_num=None, liquidity_clob=None, open_interest=None, description=None, commit=True):
+        """Add new event or update existing event with domain, section, subsection, description, and enrichment fields.
+
+        Pass commit=False to batch many calls into one transaction and call commit() once.
+        """
         event = self.session.query(Event).filter_by(id=str(event_id)).first()
 
         if event:
@@ -119,9 +189,29 @@ class Database:
             )
             self.session.add(event)
 
-        self.session.commit()
+        if commit:
+            self.session.commit()
         return event
 
+    def upsert_events(self, rows, commit=True):
+        """Add or update many events in one statement.
+
+        Each row is a dict keyed by events column name (id, slug, title, description,
+        domain, section, subsection, section_tag_id, subsection_tag_id, volume,
+        last_trade_date and the enrichment fields).
+        """
+        if rows:
+            now = datetime.utcnow()
+            self.session.execute(
+                EVENTS_UPSERT_SQL,
+                [dict(row, volume=int(row['volume']) if row['volume'] is not None else None,
+                      subsection_tag_id=row['subsection_tag_id'] or None, now=now)
+                 for row in rows],
+            )
+        if commit:
+            self.session.commit()
+        return len(rows)
+
     def update_market_data(self, event_id, volume, last_trade_date):
         """Update market data for an event."""
         event = self.session.query(Event).filter_by(id=str(event_id)).first()
@@ -135,18 +225,16 @@ class Database:
 
     def mark_inactive_events(self, active_event_ids):
         """Mark events as inactive if they're not in the active list."""
-        active_ids_str = [str(eid) for eid in active_event_ids]
-        inactive_events = self.session.query(Event).filter(
-            Event.id.notin_(active_ids_str),
-            Event.is_active == True
-        ).all()
-
-        for event in inactive_events:
-            event.is_active = False
-            event.updated_at = datetime.utcnow()
+        # Load the ids into a temp table and deactivate with one anti-join, rather than
+        # loading every inactive candidate or binding thousands of NOT IN parameters.
+        self.session.execute(ACTIVE_IDS_TABLE_SQL)
+        self.session.execute(ACTIVE_IDS_CLEAR_SQL)
+        if active_event_ids:
+            self.session.execute(ACTIVE_IDS_INSERT_SQL, [{'id': str(eid)} for eid in active_event_ids])
+        result = self.session.execute(MARK_INACTIVE_SQL, {'now': datetime.utcnow()})
 
         self.session.commit()
-        return len(inactive_events)
+        return result.rowcount
 
     def get_all_active_events(self):
         """Get all active events from database."""
@@ -175,6 +263,10 @@ class Database:
         """Get all tags from database."""
         return self.session.query(Tag).all()
 
+    def commit(self):
+        """Commit pending changes."""
+        self.session.commit()
+
     def close(self):
         """Close database session."""
         self.session.close()
\ No newline at end of file
@@ -7,8 +7,8 @@ Updates replica only when there are no active read operations.
 
 import sqlite3
 import time
-import shutil
 import threading
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 
@@ -41,6 +41,16 @@ def get_active_reads():
     with read_lock:
         return active_reads
 
+def copy_database(source_path, target_path):
+    """Copy one SQLite database over another with the backup API.
+
+    The write DB runs in WAL mode, so recent commits may still sit in its -wal file; the
+    backup API reads through SQLite and never copies a half-checkpointed file.
+    """
+    with closing(sqlite3.connect(source_path)) as source, closing(sqlite3.connect(target_path)) as target:
+        source.backup(target)
+
+
 def sync_databases():
     """Sync write DB to read DB when no active reads."""
     write_db_path = Path(WRITE_DB)
@@ -71,10 +81,10 @@ def sync_databases():
         # Create backup of read DB if it exists
         if read_db_path.exists():
             backup_path = f"{READ_DB}.backup"
-            shutil.copy2(READ_DB, backup_path)
+            copy_database(READ_DB, backup_path)
 
         # Copy write DB to read DB
-        shutil.copy2(WRITE_DB, READ_DB)
+        copy_database(WRITE_DB, READ_DB)
 
         # Verify the copy
         conn = sqlite3.connect(READ_DB)
@@ -98,7 +108,7 @@ def sync_databases():
         # Restore from backup if available
         backup_path = Path(f"{READ_DB}.backup")
         if backup_path.exists():
-            shutil.copy2(f"{READ_DB}.backup", READ_DB)
+            copy_database(f"{READ_DB}.backup", READ_DB)
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Restored read DB from backup")
 
         return False
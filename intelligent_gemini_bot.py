@@ -31,6 +31,9 @@ STOPWORDS = {
 }
 SHORT_KEYWORDS = {"ai", "uk", "us", "eu", "ufc", "nba", "nfl", "mlb"}
 DEFAULT_DISPLAY_LIMIT = 20
+# Batches scored concurrently. More workers finish sooner but send the Gemini calls in a
+# tighter burst, which a per-minute quota (15 RPM on the free tier) turns into 429s.
+BATCH_WORKERS = max(1, int(os.getenv("GEMINI_BATCH_WORKERS", "4")))
 DOMAIN_NUMBER_MAP = {
     1: "Sports: Soccer (Football)",
     2: "Sports: North American Leagues (NHL, MLB, NFL, NBA)",
@@ -1288,14 +1291,8 @@ Required columns:"""
                     context_section = f"\nADDITIONAL CONTEXT FROM PERPLEXITY SEARCH:\n{external_context}\n"
 
                 batch_prompt = f"""
-You are an event relationship evaluator.
-
-USER QUERY: {user_query}
-USER INTENT: {intent}
-{context_section}
-
-BATCH {batch_num} of events to evaluate (each with id, title, and domain):
-{json.dumps(batch_data, indent=1)}
+You are an event relationship evaluator. The user query, intent and the batch of events
+to evaluate follow these instructions.
 
 YOUR TASK:
 
@@ -1364,10 +1361,18 @@ Example:
 If no events meet the threshold, return exactly:
 "NONE"
 
+USER QUERY: {user_query}
+USER INTENT: {intent}
+{context_section}
+
+BATCH {batch_num} of events to evaluate (each with id, title, and domain):
+{json.dumps(batch_data, separators=(",", ":"), ensure_ascii=False)}
+
 Response:"""
 
                 batch_matches = []
                 batch_error = None
+                batch_by_id = {str(e.id): e for e in batch}
 
                 try:
                     result = self._call_gemini(batch_prompt, f"Batch {batch_num} Semantic Matching")
@@ -1399,7 +1404,7 @@ Response:"""
                                     score = 75
                                     reasoning = "relevant match"
 
-                                matching_event = next((e for e in batch if str(e.id) == event_id), None)
+                                matching_event = batch_by_id.get(event_id)
                                 if matching_event:
                                     # Store score and reasoning as attributes on the event object
                                     matching_event.relevance_score = score
@@ -1420,7 +1425,7 @@ Response:"""
                 return (batch_num, batch_matches, batch_error)
 
             # Execute batches in parallel using ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=min(len(batches_to_process), 4)) as executor:
+            with ThreadPoolExecutor(max_workers=min(len(batches_to_process), BATCH_WORKERS)) as executor:
                 future_to_batch = {executor.submit(process_single_batch, batch_info): batch_info[0]
                                    for batch_info in batches_to_process}
 
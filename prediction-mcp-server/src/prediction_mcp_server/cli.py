@@ -145,7 +145,7 @@ def status(config_file: Optional[Path]) -> None:
 @click.option(
     "--max-workers",
     type=int,
-    help="Thread pool size for data refresh (default 8).",
+    help="Maximum concurrent requests for data refresh (default 4).",
 )
 def update_data(interval: int, max_workers: Optional[int]) -> None:
     """Refresh prediction market data (single run or continuous scheduler)."""
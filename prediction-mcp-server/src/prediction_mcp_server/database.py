@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import os
+import sqlite3
 from datetime import datetime
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
 
 from sqlalchemy import (
     Boolean,
@@ -18,10 +19,60 @@ from sqlalchemy import (
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
+from .formatting import format_price_points
+
 DEFAULT_WRITE_DB = "polymarket.db"
 
 Base = declarative_base()
 
+# Aggregates behind the market_stats tool. They are exposed as views on the write database
+# (and so on every replica copy), and the sync service also materializes them into summary
+# tables on the replica; the server reads whichever exists.
+EVENTS_STATS_SQL = """
+    SELECT
+        COUNT(*) AS total_events,
+        SUM(CASE WHEN is_active = 1 THEN 1 ELSE 0 END) AS active_events,
+        SUM(volume) AS total_volume,
+        AVG(liquidity) AS avg_liquidity
+    FROM events
+"""
+EVENTS_DOMAIN_STATS_SQL = """
+    SELECT domain, COUNT(*) AS count, SUM(volume) AS volume
+    FROM events
+    WHERE is_active = 1
+    GROUP BY domain
+"""
+
+_EVENT_UPSERT_SQL = """
+    INSERT INTO events (
+        id, slug, title, description, domain, section, subsection, is_active,
+        volume, last_trade_date, outcome_prices, last_trade_price, best_bid, best_ask,
+        liquidity, liquidity_num, liquidity_clob, open_interest,
+        created_at, updated_at, last_synced
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        slug = excluded.slug,
+        title = excluded.title,
+        description = COALESCE(excluded.description, events.description),
+        domain = excluded.domain,
+        section = excluded.section,
+        subsection = excluded.subsection,
+        is_active = 1,
+        volume = COALESCE(excluded.volume, events.volume),
+        last_trade_date = COALESCE(excluded.last_trade_date, events.last_trade_date),
+        outcome_prices = COALESCE(excluded.outcome_prices, events.outcome_prices),
+        last_trade_price = COALESCE(excluded.last_trade_price, events.last_trade_price),
+        best_bid = COALESCE(excluded.best_bid, events.best_bid),
+        best_ask = COALESCE(excluded.best_ask, events.best_ask),
+        liquidity = COALESCE(excluded.liquidity, events.liquidity),
+        liquidity_num = COALESCE(excluded.liquidity_num, events.liquidity_num),
+        liquidity_clob = COALESCE(excluded.liquidity_clob, events.liquidity_clob),
+        open_interest = COALESCE(excluded.open_interest, events.open_interest),
+        updated_at = excluded.updated_at,
+        last_synced = excluded.last_synced
+"""
+
 
 def _resolve_db_path(path: Optional[str]) -> str:
     candidate = path or os.getenv("PREDICTION_WRITE_DB_PATH") or DEFAULT_WRITE_DB
@@ -68,6 +119,157 @@ class Tag(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+# Idempotent DDL applied on every Database() open. events_fts is the full-text
+# index behind search_markets: an external-content table keyed by the events rowid
+# and kept in sync by triggers. The partial indexes serve list_top_markets' sort
+# orders; the ORDER BY there must use the same expressions for the planner to use them.
+_SCHEMA_MIGRATIONS = (
+    "CREATE INDEX IF NOT EXISTS idx_events_active_volume "
+    "ON events(volume DESC) WHERE is_active = 1",
+    "CREATE INDEX IF NOT EXISTS idx_events_active_liquidity "
+    "ON events(liquidity DESC) WHERE is_active = 1",
+    "CREATE INDEX IF NOT EXISTS idx_events_active_updated "
+    "ON events(COALESCE(updated_at, last_trade_date) DESC) WHERE is_active = 1",
+    # Covers the per-domain totals in market_stats without touching the table.
+    "CREATE INDEX IF NOT EXISTS idx_events_active_domain "
+    "ON events(domain, volume) WHERE is_active = 1",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, slug, domain, section, subsection,
+        content='events', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, slug, domain, section, subsection)
+        VALUES (
+            new.rowid, new.title, new.description, new.slug,
+            new.domain, new.section, new.subsection
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(
+            events_fts, rowid, title, description, slug, domain, section, subsection
+        )
+        VALUES (
+            'delete', old.rowid, old.title, old.description, old.slug,
+            old.domain, old.section, old.subsection
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_au
+    AFTER UPDATE OF title, description, slug, domain, section, subsection ON events
+    WHEN old.title IS NOT new.title
+        OR old.description IS NOT new.description
+        OR old.slug IS NOT new.slug
+        OR old.domain IS NOT new.domain
+        OR old.section IS NOT new.section
+        OR old.subsection IS NOT new.subsection
+    BEGIN
+        INSERT INTO events_fts(
+            events_fts, rowid, title, description, slug, domain, section, subsection
+        )
+        VALUES (
+            'delete', old.rowid, old.title, old.description, old.slug,
+            old.domain, old.section, old.subsection
+        );
+        INSERT INTO events_fts(rowid, title, description, slug, domain, section, subsection)
+        VALUES (
+            new.rowid, new.title, new.description, new.slug,
+            new.domain, new.section, new.subsection
+        );
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events_formatted (
+        id TEXT PRIMARY KEY,
+        outcome_prices TEXT,
+        prices_md TEXT
+    )
+    """,
+    f"CREATE VIEW IF NOT EXISTS v_market_stats AS {EVENTS_STATS_SQL}",
+    f"CREATE VIEW IF NOT EXISTS v_market_stats_by_domain AS {EVENTS_DOMAIN_STATS_SQL}",
+)
+
+# Writes one rendered price block, skipping rows whose outcome_prices text is unchanged.
+_FORMATTED_UPSERT_SQL = """
+    INSERT INTO events_formatted (id, outcome_prices, prices_md) VALUES (?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        outcome_prices = excluded.outcome_prices,
+        prices_md = excluded.prices_md
+    WHERE events_formatted.outcome_prices IS NOT excluded.outcome_prices
+"""
+
+
+def _compact_outcome_prices(raw: Any) -> None:
+    """One-off rewrite of stored outcome_prices as compact JSON, then reclaim the space."""
+    cursor = raw.cursor()
+    try:
+        for table in ("events", "events_formatted"):
+            cursor.execute(
+                f"""
+                UPDATE {table} SET outcome_prices = json(outcome_prices)
+                WHERE json_valid(outcome_prices) AND outcome_prices != json(outcome_prices)
+                """
+            )
+    except sqlite3.OperationalError:
+        # SQLite built without JSON1; new writes are compact regardless.
+        raw.rollback()
+        return
+    raw.commit()
+    cursor.execute("VACUUM")
+    # VACUUM may renumber the implicit rowids the FTS index is keyed on.
+    cursor.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+    cursor.execute("PRAGMA user_version = 1")
+    raw.commit()
+
+
+def _apply_migrations(engine: Any) -> None:
+    """Create the auxiliary SQLite objects (indexes, FTS tables) used by the server."""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'index'")
+        index_count = cursor.fetchone()[0]
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'events_fts'")
+        existing = cursor.fetchone()
+        fts_exists = existing is not None and "subsection" in existing[0]
+        if existing is not None and not fts_exists:
+            # Title/description/slug-only index from an older release; FTS5 tables
+            # cannot gain columns, so drop it and its triggers and index afresh.
+            for name in ("events_fts_ai", "events_fts_ad", "events_fts_au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute("DROP TABLE events_fts")
+        for statement in _SCHEMA_MIGRATIONS:
+            cursor.execute(statement)
+        if not fts_exists:
+            # Index the rows that predate the FTS table.
+            cursor.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'index'")
+        if cursor.fetchone()[0] != index_count:
+            # Give the planner statistics for the indexes that were just created.
+            cursor.execute("ANALYZE")
+        raw.commit()
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] < 1:
+            _compact_outcome_prices(raw)
+    finally:
+        raw.close()
+
+
+def _to_int(value: Optional[float]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 class Database:
     """Minimal helper around SQLAlchemy session usage."""
 
@@ -75,6 +277,7 @@ class Database:
         self.db_path = _resolve_db_path(db_path)
         self.engine = create_engine(f"sqlite:///{self.db_path}")
         Base.metadata.create_all(self.engine)
+        _apply_migrations(self.engine)
         session_cls = sessionmaker(bind=self.engine)
         self.session: Session = session_cls()
 
@@ -104,14 +307,6 @@ class Database:
     ) -> Event:
         event = self.session.query(Event).filter_by(id=str(event_id)).first()
 
-        def _to_int(value: Optional[float]) -> Optional[int]:
-            if value is None:
-                return None
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                return None
-
         if event:
             event.slug = slug
             event.title = title
@@ -174,6 +369,67 @@ class Database:
         self.session.commit()
         return event
 
+    def bulk_upsert_events(self, pending: Sequence[Tuple[Event, Dict[str, Any]]]) -> int:
+        """Upsert refreshed market data for many events in a single transaction.
+
+        ``pending`` holds ``(event, market_data)`` pairs as produced by the market
+        updater. Fields missing from ``market_data`` keep their stored values.
+        """
+        if not pending:
+            return 0
+
+        # Match the textual DateTime format SQLAlchemy uses for SQLite columns.
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+        rows = []
+        formatted = []
+        for event, data in pending:
+            description = data.get("description")
+            volume = data.get("volume")
+            outcome_prices = data.get("outcome_prices")
+            if outcome_prices is not None:
+                formatted.append(
+                    (str(event.id), outcome_prices, format_price_points(outcome_prices))
+                )
+            rows.append(
+                (
+                    str(event.id),
+                    event.slug,
+                    event.title,
+                    description if isinstance(description, str) else None,
+                    event.domain,
+                    event.section,
+                    event.subsection,
+                    (_to_int(volume) or 0) if volume is not None else None,
+                    data.get("last_trade_date"),
+                    outcome_prices,
+                    _to_int(data.get("last_trade_price")),
+                    _to_int(data.get("best_bid")),
+                    _to_int(data.get("best_ask")),
+                    _to_int(data.get("liquidity")),
+                    _to_int(data.get("liquidity_num")),
+                    _to_int(data.get("liquidity_clob")),
+                    _to_int(data.get("open_interest")),
+                    now,
+                    now,
+                    now,
+                )
+            )
+
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.executemany(_EVENT_UPSERT_SQL, rows)
+                cursor.executemany(_FORMATTED_UPSERT_SQL, formatted)
+            except Exception:
+                raw.rollback()
+                raise
+            raw.commit()
+        finally:
+            raw.close()
+        return len(rows)
+
     def update_market_data(
         self, event_id: str, *, volume: Optional[float], last_trade_date: Optional[str]
     ) -> Optional[Event]:
@@ -191,17 +447,41 @@ class Database:
         return event
 
     def mark_inactive_events(self, active_event_ids: Iterable[str]) -> int:
-        active_set = {str(eid) for eid in active_event_ids}
-        inactive = (
-            self.session.query(Event)
-            .filter(Event.id.notin_(active_set), Event.is_active.is_(True))
-            .all()
-        )
-        for event in inactive:
-            event.is_active = False
-            event.updated_at = datetime.utcnow()
-        self.session.commit()
-        return len(inactive)
+        """Deactivate every active event whose id is not in ``active_event_ids``.
+
+        The ids are staged in a temp table so the sweep is a single UPDATE with an
+        indexed anti-join instead of a ``NOT IN`` list with one parameter per id.
+        """
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS _active_ids (id TEXT PRIMARY KEY)")
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # Pooled connections keep their temp tables, so clear any previous sweep.
+                cursor.execute("DELETE FROM _active_ids")
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO _active_ids (id) VALUES (?)",
+                    ((str(eid),) for eid in active_event_ids),
+                )
+                cursor.execute(
+                    """
+                    UPDATE events SET is_active = 0, updated_at = ?
+                    WHERE is_active = 1 AND id NOT IN (SELECT id FROM _active_ids)
+                    """,
+                    (now,),
+                )
+                deactivated = cursor.rowcount
+            except Exception:
+                raw.rollback()
+                raise
+            raw.commit()
+        finally:
+            raw.close()
+        # Events loaded through the ORM session must not keep a stale is_active.
+        self.session.expire_all()
+        return deactivated
 
     def get_all_active_events(self) -> list[Event]:
         return self.session.query(Event).filter_by(is_active=True).all()
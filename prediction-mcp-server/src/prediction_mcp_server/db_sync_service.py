@@ -3,15 +3,15 @@
 from __future__ import annotations
 
 import os
-import shutil
 import sqlite3
 import threading
 import time
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from .database import _resolve_db_path
+from .database import EVENTS_DOMAIN_STATS_SQL, EVENTS_STATS_SQL, _resolve_db_path
 
 DEFAULT_READ_DB = "polymarket_read.db"
 
@@ -53,6 +53,16 @@ def _get_paths(
     return write_path, read_path
 
 
+def _refresh_stats(conn: sqlite3.Connection) -> int:
+    """Rebuild the replica's summary tables and return the active event count."""
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS events_stats")
+        conn.execute(f"CREATE TABLE events_stats AS {EVENTS_STATS_SQL}")
+        conn.execute("DROP TABLE IF EXISTS events_domain_stats")
+        conn.execute(f"CREATE TABLE events_domain_stats AS {EVENTS_DOMAIN_STATS_SQL}")
+    return conn.execute("SELECT active_events FROM events_stats").fetchone()[0] or 0
+
+
 def sync_databases(
     write_db: Optional[str] = None,
     read_db: Optional[str] = None,
@@ -78,23 +88,18 @@ def sync_databases(
             return False
 
     try:
-        backup_path = read_path.with_suffix(read_path.suffix + ".backup")
-        if read_path.exists():
-            shutil.copy2(read_path, backup_path)
-
         read_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(write_path, read_path)
 
-        with sqlite3.connect(read_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM events WHERE is_active=1")
-            count = cur.fetchone()[0]
+        # Copy through SQLite's backup API rather than overwriting the file, so
+        # long-lived reader connections see a consistent snapshot under SQLite locking.
+        with closing(sqlite3.connect(write_path)) as source, closing(
+            sqlite3.connect(read_path)
+        ) as target:
+            source.backup(target)
+            count = _refresh_stats(target)
 
         timestamp = datetime.now().strftime("%H:%M:%S")
         print(f"[{timestamp}] ✓ Synced {count} active events to read DB")
-
-        if backup_path.exists():
-            backup_path.unlink()
         return True
     except Exception as exc:
         print(f"[{datetime.now():%H:%M:%S}] ✗ Sync failed: {exc}")
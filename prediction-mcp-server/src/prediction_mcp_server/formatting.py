@@ -0,0 +1,63 @@
+"""Display formatting shared by the MCP tools and the market data writer."""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _fmt_cents(price: Any) -> str:
+    """Render a 0-1 price as cents, or ``n/a`` when it is missing or not numeric."""
+    if price is None:
+        return "n/a"
+    try:
+        return f"{float(price) * 100:.1f}¢"
+    except (TypeError, ValueError):
+        return "n/a"
+
+
+def _price_line(key: Any, entry: Any) -> str:
+    if isinstance(entry, dict):
+        name = entry.get("outcome") or entry.get("name") or f"Outcome {key}"
+        return f"- {name}: {_fmt_cents(entry.get('price') or entry.get('probability'))}"
+    return f"- Outcome {key}: {_fmt_cents(entry)}"
+
+
+# Identical outcome blobs repeat across pages and across tools, so keep their rendering.
+@lru_cache(maxsize=4096)
+def format_price_points(outcome_prices: Optional[str | bytes]) -> str:
+    if not outcome_prices:
+        return "No outcome pricing data."
+
+    try:
+        parsed = orjson.loads(outcome_prices) if orjson is not None else json.loads(outcome_prices)
+    except ValueError:
+        return "Outcome prices unavailable (malformed JSON)."
+
+    if isinstance(parsed, dict):
+        items = list(parsed.items())
+    elif isinstance(parsed, list):
+        items = list(enumerate(parsed, 1))
+    else:
+        return "Outcome prices unavailable (unexpected structure)."
+
+    if not items:
+        return "No outcome pricing data."
+
+    # Classify the shape once: Polymarket sends a flat list of price strings, so the
+    # common case skips the per-entry dict checks.
+    if isinstance(items[0][1], dict):
+        lines = [_price_line(key, entry) for key, entry in items]
+    else:
+        try:
+            lines = [f"- Outcome {key}: {float(entry) * 100:.1f}¢" for key, entry in items]
+        except (TypeError, ValueError):
+            # A missing or non-numeric entry somewhere; render each one defensively.
+            lines = [f"- Outcome {key}: {_fmt_cents(entry)}" for key, entry in items]
+    return "\n".join(lines)
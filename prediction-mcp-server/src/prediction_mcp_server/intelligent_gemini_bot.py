@@ -8,6 +8,7 @@ Uses read-only database replica for query operations.
 import os
 import json
 import sqlite3
+import threading
 import time
 from datetime import datetime, timedelta
 from functools import lru_cache
@@ -18,6 +19,13 @@ from sqlalchemy import text, or_
 from .db_sync_service import ReadTracker
 
 DEFAULT_DISPLAY_LIMIT = 20
+# Concurrent batch scoring calls. Raise GEMINI_BATCH_WORKERS only with quota to spare:
+# a higher burst rate hits per-minute Gemini limits sooner.
+BATCH_WORKERS = max(1, int(os.getenv("GEMINI_BATCH_WORKERS", "4")))
+
+
+class QueryFailed(RuntimeError):
+    """Raised by ``process_query(..., raise_errors=True)``; the message is the error reply."""
 
 class IntelligentGeminiBot:
     def __init__(self, api_key, db_path='polymarket_read.db', log_callback=None):
@@ -31,6 +39,9 @@ class IntelligentGeminiBot:
         # Cache last structured payload for MCP clients
         self.last_structured_results = []
 
+        # Per-thread flag set when the current query's reply is an error message
+        self._query_state = threading.local()
+
         # Cache for stats
         self._stats_cache = None
         self._stats_cache_time = None
@@ -61,6 +72,10 @@ class IntelligentGeminiBot:
         """Reset cached structured payload."""
         self.last_structured_results = []
 
+    def _mark_failed(self):
+        """Flag the reply of the query running on this thread as an error."""
+        self._query_state.failed = True
+
     def _record_structured_results(self, events):
         """Store structured payload for downstream clients."""
         self.last_structured_results = events or []
@@ -456,6 +471,7 @@ Your response:"""
         except Exception as e:
             print(f"SQL execution error: {e}")
             self._record_structured_results([])
+            self._mark_failed()
             return f"Error executing query: {str(e)}. Falling back to batch processing."
 
     def execute_comparison_queries(self, comparison_queries, user_query, intent, output_format, user_limit=None):
@@ -463,6 +479,7 @@ Your response:"""
         try:
             self._record_structured_results([])
             if not comparison_queries:
+                self._mark_failed()
                 return "Error: No comparison queries provided"
 
             # Parse format: "CATEGORY1:query1|CATEGORY2:query2"
@@ -544,6 +561,7 @@ Response:"""
 
         except Exception as e:
             print(f"Comparison execution error: {e}")
+            self._mark_failed()
             return f"Error executing comparison: {str(e)}"
 
     def _identify_relevant_categories(self, user_query):
@@ -741,13 +759,8 @@ Required columns:"""
 
                 # Ask Gemini to find relevant events in this batch with relevance scores
                 batch_prompt = f"""
-You are an event relationship evaluator.
-
-USER QUERY: {user_query}
-USER INTENT: {intent}
-
-BATCH {batch_num} of events to evaluate (each with id, title, and domain):
-{json.dumps(batch_data, indent=1)}
+You are an event relationship evaluator. The user query, intent and the batch of events
+to evaluate follow these instructions.
 
 YOUR TASK:
 
@@ -811,10 +824,17 @@ Example:
 If no events meet the threshold, return exactly:
 "NONE"
 
+USER QUERY: {user_query}
+USER INTENT: {intent}
+
+BATCH {batch_num} of events to evaluate (each with id, title, and domain):
+{json.dumps(batch_data, separators=(",", ":"), ensure_ascii=False)}
+
 Response:"""
 
                 batch_matches = []
                 batch_error = None
+                batch_by_id = {str(e.id): e for e in batch}
 
                 try:
                     result = self._call_gemini(batch_prompt, f"Batch {batch_num} Semantic Matching")
@@ -846,7 +866,7 @@ Response:"""
                                     score = 75
                                     reasoning = "relevant match"
 
-                                matching_event = next((e for e in batch if str(e.id) == event_id), None)
+                                matching_event = batch_by_id.get(event_id)
                                 if matching_event:
                                     # Store score and reasoning as attributes on the event object
                                     matching_event.relevance_score = score
@@ -867,7 +887,7 @@ Response:"""
                 return (batch_num, batch_matches, batch_error)
 
             # Execute batches in parallel using ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=min(len(batches_to_process), 4)) as executor:
+            with ThreadPoolExecutor(max_workers=min(len(batches_to_process), BATCH_WORKERS)) as executor:
                 future_to_batch = {executor.submit(process_single_batch, batch_info): batch_info[0]
                                    for batch_info in batches_to_process}
 
@@ -877,6 +897,7 @@ Response:"""
                     if batch_error:
                         if len(batch_error) == 3 and batch_error[2]:  # Rate limit error
                             self._record_structured_results([])
+                            self._mark_failed()
                             return f"⚠️ **API Rate Limit Error**\n\nThe Gemini API free tier has a limit of 15 requests per minute. Please wait a moment and try again.\n\n**Error details:** {batch_error[1]}\n\n**Tip:** Upgrade your API plan for higher limits at https://ai.google.dev/gemini-api/docs/rate-limits"
                         batch_errors.append((batch_error[0], batch_error[1]))
 
@@ -900,6 +921,7 @@ Response:"""
                 if batch_errors:
                     error_details = "\n".join([f"  - Batch {num}: {err[:100]}..." for num, err in batch_errors[:3]])
                     self._record_structured_results([])
+                    self._mark_failed()
                     return f"❌ **Error processing query**\n\n{error_details}\n\nPlease try again or simplify your query."
                 self._record_structured_results([])
                 return f"No relevant events found for: {user_query}"
@@ -909,6 +931,7 @@ Response:"""
         except Exception as e:
             print(f"Batch processing error: {e}")
             self._record_structured_results([])
+            self._mark_failed()
             return f"Error processing query: {str(e)}"
     
     def _format_final_answer(self, user_query, events, intent, output_format, user_limit=None):
@@ -971,8 +994,20 @@ Response:"""
         self._record_structured_results(structured_results)
         return '\n\n'.join(output_lines)
     
-    def process_query(self, user_query):
-        """Main query processing with intelligent strategy selection."""
+    def process_query(self, user_query, raise_errors=False):
+        """Main query processing with intelligent strategy selection.
+
+        Errors are returned as a readable reply; with ``raise_errors`` an error reply (or an
+        empty one) raises ``QueryFailed`` instead, so callers can avoid caching it.
+        """
+        self._query_state.failed = False
+        answer = self._process_query(user_query)
+        if raise_errors and (self._query_state.failed or not (answer or '').strip()):
+            raise QueryFailed(answer or 'Empty response')
+        return answer
+
+    def _process_query(self, user_query):
+        """Run the strategy pipeline for one query and return the reply text."""
         try:
             # Log query
             self._log("info", f"📥 Query: {user_query}")
@@ -1035,11 +1070,13 @@ USER QUERY: {user_query}"""
                 self._log("info", f"✅ Batch processing complete")
                 return result
             else:
+                self._mark_failed()
                 return "Error: Unknown strategy"
 
         except Exception as e:
             self._log("error", f"❌ Error: {str(e)}")
             self._record_structured_results([])
+            self._mark_failed()
             return f"I encountered an error: {str(e)}"
     
     def close(self):
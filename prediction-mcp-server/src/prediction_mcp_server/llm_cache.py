@@ -0,0 +1,91 @@
+"""Persistent exact-match cache for LLM answers, stored in a sidecar SQLite file."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DB = "prediction_llm_cache.db"
+DEFAULT_TTL_SECONDS = 3600.0
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _get_ttl() -> float:
+    try:
+        value = float(os.getenv("PREDICTION_LLM_CACHE_TTL", str(DEFAULT_TTL_SECONDS)))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+    return max(0.0, value)
+
+
+def _get_cache_path() -> Path:
+    raw = os.getenv("PREDICTION_LLM_CACHE_PATH") or DEFAULT_CACHE_DB
+    return Path(raw).expanduser()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database once per process and drop expired answers."""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(_get_cache_path(), check_same_thread=False)
+        # Several server processes may share the file; WAL keeps their reads unblocked.
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                hash TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - _get_ttl(),))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _cache_key(model: str, question: str) -> str:
+    return hashlib.sha256(f"{model}|{question.strip().lower()}".encode("utf-8")).hexdigest()
+
+
+def get_answer(model: str, question: str) -> Optional[str]:
+    """Return a cached answer for ``question`` from ``model`` if it is still fresh."""
+    ttl = _get_ttl()
+    if ttl <= 0:
+        return None
+    try:
+        with _lock:
+            row = _connect().execute(
+                "SELECT answer FROM llm_cache WHERE hash = ? AND created_at >= ?",
+                (_cache_key(model, question), time.time() - ttl),
+            ).fetchone()
+    except sqlite3.Error:
+        return None  # A broken cache must never break the tool itself.
+    return row[0] if row else None
+
+
+def store_answer(model: str, question: str, answer: str) -> None:
+    """Remember ``answer`` for ``question`` from ``model``."""
+    if _get_ttl() <= 0:
+        return
+    try:
+        with _lock:
+            conn = _connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (hash, model, question, answer, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (_cache_key(model, question), model, question.strip(), answer, time.time()),
+            )
+            conn.commit()
+    except sqlite3.Error:
+        pass
@@ -2,28 +2,47 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import random
+import signal
 import threading
 
+import httpx
 import requests
-import schedule
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from .database import Database, Event
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional dependency
+    simdjson = None
+
 GAMMA_API = "https://gamma-api.polymarket.com"
 MAX_ATTEMPTS = int(os.getenv("PREDICTION_UPDATE_MAX_RETRIES", "5"))
 BACKOFF_FACTOR = float(os.getenv("PREDICTION_UPDATE_BACKOFF", "1.5"))
 MAX_BACKOFF_SECONDS = float(os.getenv("PREDICTION_UPDATE_MAX_BACKOFF", "30"))
 REQUEST_THROTTLE = float(os.getenv("PREDICTION_UPDATE_THROTTLE", "0.15"))
 MAX_CONCURRENT_REQUESTS = max(1, int(os.getenv("PREDICTION_UPDATE_CONCURRENCY", "4")))
+HTTP_MAX_CONNECTIONS = max(1, int(os.getenv("PREDICTION_UPDATE_MAX_CONNECTIONS", "32")))
+WRITE_BATCH_SIZE = max(1, int(os.getenv("PREDICTION_UPDATE_BATCH_SIZE", "100")))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("PREDICTION_UPDATE_KEEPALIVE", "60"))
+WRITE_QUEUE_SIZE = 256
+# Deactivating events that left the active listing only runs every Nth bootstrap;
+# the active set changes slowly and the sweep writes across the whole table.
+INACTIVE_SWEEP_EVERY = max(1, int(os.getenv("PREDICTION_INACTIVE_SWEEP_EVERY", "10")))
 
 retry_strategy = Retry(
     total=MAX_ATTEMPTS,
@@ -40,6 +59,35 @@ SESSION.mount("https://", adapter)
 SESSION.mount("http://", adapter)
 REQUEST_SEMAPHORE = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
 
+# Only the event loop thread decodes event payloads, so one reusable parser suffices.
+_SIMDJSON_PARSER = simdjson.Parser() if simdjson is not None else None
+
+# Returned by conditional requests when the payload has not changed since the last fetch.
+NOT_MODIFIED = object()
+
+# path -> (ETag, Last-Modified, body digest) from the last successful conditional fetch.
+_VALIDATORS: Dict[str, Tuple[Optional[str], Optional[str], bytes]] = {}
+_VALIDATORS_LOCK = threading.Lock()
+
+_BOOTSTRAP_CALLS = 0
+
+# event id -> fingerprint of the market data last written for it.
+_LAST_HASH: Dict[str, int] = {}
+_LAST_HASH_LOCK = threading.Lock()
+_FINGERPRINT_FIELDS = (
+    "volume",
+    "last_trade_price",
+    "best_bid",
+    "best_ask",
+    "liquidity",
+    "liquidity_num",
+    "liquidity_clob",
+    "open_interest",
+    "outcome_prices",
+    "last_trade_date",
+    "description",
+)
+
 
 def _safe_float(value: Optional[object]) -> Optional[float]:
     if value in (None, "", "null"):
@@ -50,8 +98,29 @@ def _safe_float(value: Optional[object]) -> Optional[float]:
         return None
 
 
+def _canonical_prices(raw: Any) -> Optional[str]:
+    """Normalise ``outcomePrices`` to compact JSON text.
+
+    Gamma sends the prices as a JSON-encoded string; decoding it once here means the
+    stored value is always the same canonical form regardless of how the API spelled it.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, (str, bytes)):
+        try:
+            raw = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except ValueError:
+            return raw if isinstance(raw, str) else None
+    if orjson is not None:
+        return orjson.dumps(raw).decode()
+    return json.dumps(raw, separators=(",", ":"))
+
+
 def bootstrap_active_events(db: Database, limit: int = 500) -> List[str]:
     """Fetch metadata for all active events and ensure they exist in the DB."""
+    global _BOOTSTRAP_CALLS
+    sweep_inactive = _BOOTSTRAP_CALLS % INACTIVE_SWEEP_EVERY == 0
+    _BOOTSTRAP_CALLS += 1
     offset = 0
     all_events: List[Dict[str, object]] = []
 
@@ -125,8 +194,7 @@ def bootstrap_active_events(db: Database, limit: int = 500) -> List[str]:
         if isinstance(markets, list) and markets:
             market = markets[0]
             if isinstance(market, dict):
-                raw_prices = market.get("outcomePrices", "[]")
-                outcome_prices = json.dumps(raw_prices) if not isinstance(raw_prices, str) else raw_prices
+                outcome_prices = _canonical_prices(market.get("outcomePrices", "[]"))
                 last_trade_price = _safe_float(market.get("lastTradePrice"))
                 best_bid = _safe_float(market.get("bestBid"))
                 best_ask = _safe_float(market.get("bestAsk"))
@@ -156,20 +224,15 @@ def bootstrap_active_events(db: Database, limit: int = 500) -> List[str]:
         active_ids.append(event_id)
 
     if active_ids:
-        db.mark_inactive_events(active_ids)
+        if sweep_inactive:
+            db.mark_inactive_events(active_ids)
         print(f"  Refreshed metadata for {len(active_ids)} active events")
 
     return active_ids
 
 
-def fetch_event_market_data(event_id: str) -> Optional[Dict[str, object]]:
-    """Fetch granular market data for a single event."""
-    try:
-        data = _request_json(f"/events/{event_id}", timeout=10)
-    except Exception as exc:
-        print(f"  Error fetching market data for {event_id}: {exc}")
-        return None
-
+def _parse_event_market_data(data: Any) -> Dict[str, object]:
+    """Extract the fields we persist from an ``/events/{id}`` payload."""
     event_data: Dict[str, object]
     if isinstance(data, list) and data:
         event_data = data[0]
@@ -186,8 +249,7 @@ def fetch_event_market_data(event_id: str) -> Optional[Dict[str, object]]:
     if isinstance(markets, list) and markets:
         market = markets[0]
         if isinstance(market, dict):
-            raw_prices = market.get("outcomePrices", "[]")
-            outcome_prices = json.dumps(raw_prices) if not isinstance(raw_prices, str) else raw_prices
+            outcome_prices = _canonical_prices(market.get("outcomePrices", "[]"))
             last_trade_price = _safe_float(market.get("lastTradePrice"))
             best_bid = _safe_float(market.get("bestBid"))
             best_ask = _safe_float(market.get("bestAsk"))
@@ -208,42 +270,155 @@ def fetch_event_market_data(event_id: str) -> Optional[Dict[str, object]]:
     }
 
 
-def _update_single_event(event: Event) -> bool:
-    db = Database()
+def _pointer(doc: Any, pointer: str, default: Any = None) -> Any:
+    """Read one JSON pointer from a simdjson document, or ``default`` if it is absent."""
     try:
-        market_data = fetch_event_market_data(event.id)
-        if not market_data:
-            return False
+        value = doc.at_pointer(pointer)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return default
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    return value
+
+
+def _decode_event_market_data(content: bytes) -> Dict[str, object]:
+    """Decode an ``/events/{id}`` body into the fields we persist.
+
+    With simdjson installed only the handful of persisted fields are materialised;
+    otherwise the whole body is loaded and handed to ``_parse_event_market_data``.
+    """
+    if _SIMDJSON_PARSER is None:
+        return _parse_event_market_data(json.loads(content))
+    doc = _SIMDJSON_PARSER.parse(content)
+    if not isinstance(doc, (simdjson.Array, simdjson.Object)):
+        return _parse_event_market_data(doc)
+
+    base = "/0" if isinstance(doc, simdjson.Array) else ""
+    market = f"{base}/markets/0"
+    return {
+        "volume": _safe_float(_pointer(doc, f"{base}/volume")),
+        "last_trade_date": _pointer(doc, f"{base}/endDateIso") or _pointer(doc, f"{base}/endDate"),
+        "description": _pointer(doc, f"{base}/description"),
+        "outcome_prices": _canonical_prices(_pointer(doc, f"{market}/outcomePrices", "[]")),
+        "last_trade_price": _safe_float(_pointer(doc, f"{market}/lastTradePrice")),
+        "best_bid": _safe_float(_pointer(doc, f"{market}/bestBid")),
+        "best_ask": _safe_float(_pointer(doc, f"{market}/bestAsk")),
+        "liquidity": _safe_float(_pointer(doc, f"{base}/liquidity")),
+        "liquidity_num": _safe_float(_pointer(doc, f"{market}/liquidityNum")),
+        "liquidity_clob": _safe_float(_pointer(doc, f"{base}/liquidityClob")),
+        "open_interest": _safe_float(_pointer(doc, f"{base}/openInterest")),
+    }
 
-        db.add_or_update_event(
-            event_id=event.id,
-            slug=event.slug,
-            title=event.title,
-            domain=event.domain,
-            section=event.section,
-            subsection=event.subsection,
-            volume=market_data["volume"],
-            last_trade_date=market_data["last_trade_date"],
-            description=market_data["description"] if isinstance(market_data["description"], str) else None,
-            outcome_prices=market_data["outcome_prices"],
-            last_trade_price=market_data["last_trade_price"],
-            best_bid=market_data["best_bid"],
-            best_ask=market_data["best_ask"],
-            liquidity=market_data["liquidity"],
-            liquidity_num=market_data["liquidity_num"],
-            liquidity_clob=market_data["liquidity_clob"],
-            open_interest=market_data["open_interest"],
+
+def _event_path(event_id: str) -> str:
+    return f"/events/{event_id}"
+
+
+def _forget_inactive_events(active_ids: Iterable[str]) -> None:
+    """Drop fingerprints and validators of events that are no longer active.
+
+    Both maps are keyed per event and would otherwise keep every event ever seen.
+    """
+    active = set(active_ids)
+    with _LAST_HASH_LOCK:
+        for event_id in _LAST_HASH.keys() - active:
+            del _LAST_HASH[event_id]
+    active_paths = {_event_path(event_id) for event_id in active}
+    with _VALIDATORS_LOCK:
+        for path in _VALIDATORS.keys() - active_paths:
+            del _VALIDATORS[path]
+
+
+def _payload_fingerprint(market_data: Dict[str, object]) -> int:
+    """Cheap in-process fingerprint of the fields we persist for an event."""
+    return hash(tuple(market_data.get(field) for field in _FINGERPRINT_FIELDS))
+
+
+async def fetch_event_market_data_async(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, event_id: str
+) -> Any:
+    """Fetch granular market data for a single event.
+
+    Returns ``NOT_MODIFIED`` when the event payload is unchanged since the last fetch.
+    """
+    try:
+        content = await _request_json_async(
+            client, sem, _event_path(event_id), timeout=10, conditional=True, raw=True
         )
-        return True
+        if content is NOT_MODIFIED:
+            return NOT_MODIFIED
+        return _decode_event_market_data(content)
+    except Exception as exc:
+        print(f"  Error fetching market data for {event_id}: {exc}")
+        return None
+
+
+async def _update_single_event(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, event: Event
+) -> Optional[Tuple[Event, Optional[Dict[str, object]]]]:
+    """Fetch fresh market data for an event; the caller persists it in batches.
+
+    Unchanged events come back as ``(event, None)`` and need no DB write.
+    """
+    try:
+        market_data = await fetch_event_market_data_async(client, sem, event.id)
     except Exception as exc:
         print(f"  Error updating event {event.slug}: {exc}")
-        return False
-    finally:
-        db.close()
+        return None
+    if market_data is NOT_MODIFIED:
+        return event, None
+    if not market_data:
+        return None
+    with _LAST_HASH_LOCK:
+        previous = _LAST_HASH.get(event.id)
+    if previous == _payload_fingerprint(market_data):
+        return event, None
+    return event, market_data
 
 
-def update_all_market_data(max_workers: Optional[int] = None) -> None:
-    """Refresh all active event records with a thread pool."""
+def _flush_pending(db: Database, pending: List[Tuple[Event, Dict[str, object]]]) -> int:
+    """Write buffered event updates in one transaction and clear the buffer."""
+    if not pending:
+        return 0
+    try:
+        written = db.bulk_upsert_events(pending)
+    except Exception as exc:
+        print(f"  Error writing batch of {len(pending)} events: {exc}")
+        # Drop cached validators so these events are fetched and written again next run.
+        with _VALIDATORS_LOCK:
+            for event, _ in pending:
+                _VALIDATORS.pop(_event_path(event.id), None)
+        written = 0
+    else:
+        with _LAST_HASH_LOCK:
+            for event, market_data in pending:
+                _LAST_HASH[event.id] = _payload_fingerprint(market_data)
+    pending.clear()
+    return written
+
+
+async def _db_writer(
+    db: Database, queue: "asyncio.Queue[Optional[Tuple[Event, Dict[str, object]]]]"
+) -> int:
+    """Sole consumer of fetched updates; writes them in batches until it receives ``None``."""
+    pending: List[Tuple[Event, Dict[str, object]]] = []
+    written = 0
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        pending.append(item)
+        if len(pending) >= WRITE_BATCH_SIZE:
+            # Commit off the event loop so in-flight fetches keep draining meanwhile.
+            written += await asyncio.to_thread(_flush_pending, db, pending)
+    written += await asyncio.to_thread(_flush_pending, db, pending)
+    return written
+
+
+async def update_all_market_data_async(max_workers: Optional[int] = None) -> None:
+    """Refresh all active event records using concurrent async requests."""
     timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] Starting market data update...")
     worker_default = int(os.getenv("PREDICTION_UPDATE_WORKERS", str(MAX_CONCURRENT_REQUESTS)))
@@ -253,36 +428,90 @@ def update_all_market_data(max_workers: Optional[int] = None) -> None:
     try:
         bootstrap_active_events(db)
         active_events = db.get_all_active_events()
-        print(f"  Processing {len(active_events)} active events using {workers} workers")
-
-        updated = 0
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {executor.submit(_update_single_event, event): event for event in active_events}
-            for idx, future in enumerate(as_completed(futures), 1):
-                if future.result():
-                    updated += 1
-                if idx % 100 == 0:
-                    print(f"  Progress: processed {idx}/{len(active_events)} events")
-
-        print(f"  Updated market data for {updated} events")
+        _forget_inactive_events(event.id for event in active_events)
+        print(f"  Processing {len(active_events)} active events with {workers} concurrent requests")
+
+        unchanged = 0
+        sem = asyncio.Semaphore(workers)
+        queue: "asyncio.Queue[Optional[Tuple[Event, Dict[str, object]]]]" = asyncio.Queue(
+            maxsize=WRITE_QUEUE_SIZE
+        )
+        writer = asyncio.create_task(_db_writer(db, queue))
+        try:
+            async with httpx.AsyncClient(
+                base_url=GAMMA_API,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                ),
+            ) as client:
+                tasks = [_update_single_event(client, sem, event) for event in active_events]
+                for idx, coro in enumerate(asyncio.as_completed(tasks), 1):
+                    result = await coro
+                    if result is not None:
+                        if result[1] is None:
+                            unchanged += 1
+                        else:
+                            await queue.put(result)
+                    if idx % 100 == 0:
+                        print(f"  Progress: processed {idx}/{len(active_events)} events")
+        finally:
+            await queue.put(None)
+            updated = await writer
+
+        print(f"  Updated market data for {updated} events ({unchanged} unchanged)")
         print(f"[{datetime.utcnow():%Y-%m-%d %H:%M:%S}] Market data update complete\n")
     finally:
         db.close()
 
 
+def update_all_market_data(max_workers: Optional[int] = None) -> None:
+    """Synchronous entrypoint for a single market data refresh."""
+    asyncio.run(update_all_market_data_async(max_workers=max_workers))
+
+
 def run_scheduler(interval_seconds: int = 20, max_workers: Optional[int] = None) -> None:
-    """Continuously refresh market data every interval seconds."""
-    print("Starting Polymarket market data updater...")
-    update_all_market_data(max_workers=max_workers)
-    schedule.every(interval_seconds).seconds.do(update_all_market_data, max_workers=max_workers)
+    """Continuously refresh market data every interval seconds.
+
+    Runs are spaced start-to-start on the monotonic clock; a run that overruns the
+    interval is followed immediately by the next one rather than queueing extras.
+    SIGTERM and Ctrl+C stop the loop once the current run finishes.
+    """
+    stop = threading.Event()
+
+    def _request_stop(signum: int, frame: Any) -> None:
+        stop.set()
+
+    try:
+        signal.signal(signal.SIGTERM, _request_stop)
+    except ValueError:  # Not the main thread; rely on KeyboardInterrupt only.
+        pass
 
+    print("Starting Polymarket market data updater...")
     print(f"Scheduler running. Updating every {interval_seconds} seconds. Ctrl+C to stop.")
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        while not stop.is_set():
+            started = time.monotonic()
+            update_all_market_data(max_workers=max_workers)
+            stop.wait(max(0.0, interval_seconds - (time.monotonic() - started)))
     except KeyboardInterrupt:
-        print("\nStopping market updater.")
+        pass
+    print("\nStopping market updater.")
+
+
+def _retry_delay(headers: Any, attempt: int) -> float:
+    """Return the backoff delay for a 429 response, honouring Retry-After."""
+    retry_after_header = headers.get("Retry-After")
+    if retry_after_header:
+        try:
+            delay = float(retry_after_header)
+        except ValueError:
+            delay = BACKOFF_FACTOR ** attempt
+    else:
+        delay = BACKOFF_FACTOR ** attempt
+    return min(delay, MAX_BACKOFF_SECONDS)
 
 
 def _request_json(path: str, params: Optional[Dict[str, object]] = None, timeout: int = 15) -> Any:
@@ -300,16 +529,7 @@ def _request_json(path: str, params: Optional[Dict[str, object]] = None, timeout
             if response.status_code == 429:
                 if attempt == attempts - 1:
                     response.raise_for_status()
-                retry_after_header = response.headers.get("Retry-After")
-                if retry_after_header:
-                    try:
-                        delay = float(retry_after_header)
-                    except ValueError:
-                        delay = BACKOFF_FACTOR ** attempt
-                else:
-                    delay = BACKOFF_FACTOR ** attempt
-                delay = min(delay, MAX_BACKOFF_SECONDS)
-                time.sleep(delay)
+                time.sleep(_retry_delay(response.headers, attempt))
                 continue
 
             response.raise_for_status()
@@ -322,3 +542,73 @@ def _request_json(path: str, params: Optional[Dict[str, object]] = None, timeout
             time.sleep(delay)
 
     raise RuntimeError("Exceeded maximum retry attempts")
+
+
+async def _request_json_async(
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    path: str,
+    params: Optional[Dict[str, object]] = None,
+    timeout: int = 15,
+    conditional: bool = False,
+    raw: bool = False,
+) -> Any:
+    """Async counterpart of ``_request_json`` sharing one pooled HTTP/2 client.
+
+    With ``conditional=True`` the request revalidates against the previous response
+    (``If-None-Match``/``If-Modified-Since``) and returns ``NOT_MODIFIED`` on a 304 or
+    when the body hashes to the same digest as last time. ``raw=True`` returns the
+    undecoded body bytes so the caller can choose its own parser.
+    """
+    attempts = MAX_ATTEMPTS
+    headers: Dict[str, str] = {}
+    cached = None
+    if conditional:
+        with _VALIDATORS_LOCK:
+            cached = _VALIDATORS.get(path)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+    for attempt in range(attempts):
+        try:
+            async with sem:
+                if REQUEST_THROTTLE > 0:
+                    await asyncio.sleep(REQUEST_THROTTLE + random.uniform(0, REQUEST_THROTTLE))
+                response = await client.get(path, params=params, headers=headers, timeout=timeout)
+
+            if conditional and response.status_code == 304:
+                return NOT_MODIFIED
+
+            if response.status_code == 429:
+                if attempt == attempts - 1:
+                    response.raise_for_status()
+                await asyncio.sleep(_retry_delay(response.headers, attempt))
+                continue
+
+            response.raise_for_status()
+            if not conditional:
+                return response.content if raw else response.json()
+
+            # Endpoints without validators still let us skip parsing identical bodies.
+            digest = hashlib.blake2b(response.content, digest_size=16).digest()
+            if cached and cached[2] == digest:
+                return NOT_MODIFIED
+            with _VALIDATORS_LOCK:
+                _VALIDATORS[path] = (
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    digest,
+                )
+            return response.content if raw else response.json()
+
+        except httpx.HTTPError:
+            if attempt == attempts - 1:
+                raise
+            delay = min((BACKOFF_FACTOR ** attempt), MAX_BACKOFF_SECONDS)
+            await asyncio.sleep(delay)
+
+    raise RuntimeError("Exceeded maximum retry attempts")
@@ -3,27 +3,34 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hashlib
 import os
 import re
 import sqlite3
 import sys
-from contextlib import closing
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from textwrap import dedent
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote
 
-from dotenv import load_dotenv
+import httpx
+from dotenv import dotenv_values, load_dotenv
 from mcp.server.fastmcp import FastMCP
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from .db_sync_service import ReadTracker
+from .db_sync_service import EVENTS_DOMAIN_STATS_SQL, EVENTS_STATS_SQL, ReadTracker
+from .formatting import format_price_points
+from .llm_cache import get_answer, store_answer
 
 try:
-    from .intelligent_gemini_bot import IntelligentGeminiBot
+    from .intelligent_gemini_bot import IntelligentGeminiBot, QueryFailed
 except ImportError:  # pragma: no cover
     IntelligentGeminiBot = None  # type: ignore
+    QueryFailed = RuntimeError  # type: ignore
 
 # Try to import the multi-platform bot
 try:
@@ -36,12 +43,16 @@ except ImportError:  # pragma: no cover
     IntelligentMultiPlatformBot = None  # type: ignore
 
 
+# The environment is settled once PredictionMCPServer has loaded its .env file, so the
+# resolved paths are memoized; PredictionMCPServer clears them after loading.
+@lru_cache(maxsize=1)
 def _get_db_path() -> Path:
     """Resolve the SQLite database path from the environment."""
     raw = os.getenv("PREDICTION_DB_PATH") or "polymarket_read.db"
     return Path(raw).expanduser()
 
 
+@lru_cache(maxsize=1)
 def _get_kalshi_db_path() -> Path:
     """Resolve the Kalshi SQLite database path from the environment."""
     raw = os.getenv("KALSHI_DB_PATH") or "kalshi_read.db"
@@ -60,6 +71,60 @@ def _get_default_limit(limit: Optional[int] = None) -> int:
         return 25
 
 
+def _get_env_seconds(name: str, default: float) -> float:
+    """Read a non-negative duration in seconds from the environment."""
+    try:
+        value = float(os.getenv(name, str(default)) or default)
+    except ValueError:
+        return default
+    return max(0.0, value)
+
+
+class _TTLCache:
+    """Small thread-safe in-process cache with a time-to-live and FIFO eviction.
+
+    The TTL is read from ``ttl_env`` on each access so values loaded from the
+    ``.env`` file after import are respected. A TTL of 0 disables caching.
+    """
+
+    def __init__(self, ttl_env: str, default_ttl: float, max_entries: int = 512) -> None:
+        self._ttl_env = ttl_env
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._entries: Dict[str, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        ttl = _get_env_seconds(self._ttl_env, self._default_ttl)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= ttl:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if _get_env_seconds(self._ttl_env, self._default_ttl) <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self._max_entries:
+                del self._entries[next(iter(self._entries))]
+
+
+_STATS_CACHE = _TTLCache("PREDICTION_STATS_TTL", 30.0)
+_ANSWER_CACHE = _TTLCache("PREDICTION_ANSWER_TTL", 60.0, max_entries=512)
+
+
+def _question_key(question: str) -> str:
+    """Normalize a question into a stable cache key."""
+    return hashlib.blake2b(question.strip().lower().encode("utf-8")).hexdigest()
+
+
 def _ensure_database() -> Path:
     path = _get_db_path()
     if not path.exists():
@@ -70,64 +135,80 @@ def _ensure_database() -> Path:
     return path
 
 
-def _fetch_rows(sql: str, params: Iterable[Any] = (), fetch_one: bool = False) -> Any:
-    """Run a read-only SQL query with read tracking."""
-    database = _ensure_database()
+# One read-only connection per (thread, database). Each keeps its page cache, mmap and
+# compiled statement cache warm across tool calls without sharing a handle across threads.
+_CONN_LOCAL = threading.local()
 
-    with ReadTracker():
-        with closing(sqlite3.connect(database)) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(sql, tuple(params))
-            return cursor.fetchone() if fetch_one else cursor.fetchall()
 
+def _ro_uri(database: Path) -> str:
+    # Percent-encode so "?", "#" and "%" in the path are not read as URI syntax.
+    return f"file:{quote(database.resolve().as_posix())}?mode=ro"
 
-def _format_price_points(outcome_prices: Optional[str]) -> str:
-    if not outcome_prices:
-        return "No outcome pricing data."
 
-    try:
-        parsed = json.loads(outcome_prices)
-    except json.JSONDecodeError:
-        return "Outcome prices unavailable (malformed JSON)."
-
-    if isinstance(parsed, dict):
-        items = parsed.items()
-    elif isinstance(parsed, list):
-        items = enumerate(parsed, 1)
-    else:
-        return "Outcome prices unavailable (unexpected structure)."
+def _tune_schema(conn: sqlite3.Connection, schema: str) -> None:
+    conn.execute(f"PRAGMA {schema}.cache_size = -64000")
+    conn.execute(f"PRAGMA {schema}.mmap_size = 268435456")
 
-    lines = []
-    for key, entry in items:
-        if isinstance(entry, dict):
-            name = entry.get("outcome") or entry.get("name") or f"Outcome {key}"
-            price = entry.get("price") or entry.get("probability")
-            if price is not None:
-                try:
-                    price_val = float(price)
-                except (TypeError, ValueError):
-                    price_val = None
-            else:
-                price_val = None
+
+def _open_ro_conn(database: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(_ro_uri(database), uri=True, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    _tune_schema(conn, "main")
+    return conn
+
+
+def _get_conn(db_key: str) -> sqlite3.Connection:
+    """Return this thread's read-only connection for ``db_key`` ("polymarket" or "kalshi").
+
+    Each platform has its own connection, so either replica works without the other.
+    """
+    conn = getattr(_CONN_LOCAL, db_key, None)
+    if conn is None:
+        if db_key == "polymarket":
+            conn = _open_ro_conn(_ensure_database())
         else:
-            name = f"Outcome {key}"
-            try:
-                price_val = float(entry)
-            except (TypeError, ValueError):
-                price_val = None
+            conn = _open_ro_conn(_ensure_kalshi_database())
+        setattr(_CONN_LOCAL, db_key, conn)
+    return conn
+
 
-        cents = f"{price_val * 100:.1f}¢" if price_val is not None else "n/a"
-        lines.append(f"- {name}: {cents}")
+# sqlite3 binds any sequence, so callers' lists and tuples are passed through uncopied.
+def _fetch(db_key: str, sql: str, params: Sequence[Any] = (), fetch_one: bool = False) -> Any:
+    cursor = _get_conn(db_key).execute(sql, params)
+    return cursor.fetchone() if fetch_one else cursor.fetchall()
 
-    return "\n".join(lines) if lines else "No outcome pricing data."
+
+def _fetch_rows(sql: str, params: Sequence[Any] = (), fetch_one: bool = False) -> Any:
+    """Run a read-only SQL query on the replica with read tracking."""
+    with ReadTracker():
+        return _fetch("polymarket", sql, params, fetch_one)
 
 
+# Python 3.11+ parses a trailing "Z" natively, so the replace() copy is only needed before.
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+
+# Sync ticks stamp many rows with the same value, so the cache hit rate stays high.
+@lru_cache(maxsize=65536)
 def _format_timestamp(value: Optional[str]) -> str:
     if not value:
         return "n/a"
+    # Full ISO-8601 datetimes ("2024-01-02T15:04:05Z", SQLAlchemy's "2024-01-02 15:04:05.123")
+    # already carry the wanted fields in place; only other shapes need a real parse.
+    if (
+        len(value) >= 16
+        and value[4] == "-"
+        and value[7] == "-"
+        and value[10] in "T "
+        and value[13] == ":"
+        and value[:4].isdigit()
+    ):
+        return f"{value[:10]} {value[11:16]}"
+    iso = value if _FROMISOFORMAT_ACCEPTS_Z else value.replace("Z", "+00:00")
     try:
-        return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M")
+        return datetime.fromisoformat(iso).strftime("%Y-%m-%d %H:%M")
     except ValueError:
         return value
 
@@ -138,7 +219,22 @@ mcp = FastMCP(SERVER_ID, log_level=LOG_LEVEL)
 
 _gemini_bot: Optional[IntelligentGeminiBot] = None
 _multi_platform_bot: Optional[Any] = None  # IntelligentMultiPlatformBot type
-_openai_client: Optional[OpenAI] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+# The bots hold one SQLAlchemy session and per-query state, so each runs one query at a
+# time; tool calls still leave the event loop free while they wait.
+_gemini_bot_lock = threading.Lock()
+_multi_platform_bot_lock = threading.Lock()
+
+
+async def _run_bot_query(lock: threading.Lock, bot: Any, *args: Any, **kwargs: Any) -> str:
+    """Run ``bot.process_query`` on a worker thread, one query per bot at a time."""
+
+    def run() -> str:
+        with lock:
+            return bot.process_query(*args, **kwargs)
+
+    return await asyncio.to_thread(run)
 
 
 def _get_gemini_bot() -> IntelligentGeminiBot:
@@ -186,37 +282,86 @@ def _get_multi_platform_bot() -> Any:
     return _multi_platform_bot
 
 
+# Row templates are plain format strings: no per-row dedent pass, and multi-line price
+# blocks can no longer defeat dedent and leave the rest of the block indented.
+_MARKET_TMPL = (
+    "**{title}**\n"
+    "• ID: `{id}`\n"
+    "• Slug: `{slug}`\n"
+    "• Category: {hierarchy}\n"
+    "• Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}\n"
+    "• Last Trade: {last_trade}\n"
+    "• Updated: {updated}\n"
+    "• Outcomes:\n"
+    "{prices}\n"
+    "• Link: {url}"
+)
+_KALSHI_MARKET_TMPL = (
+    "**{title}**{contract_info}\n"
+    "• Ticker: `{ticker}`\n"
+    "• Category: {category}\n"
+    "• Status: {status}\n"
+    "• Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}\n"
+    "• Prices: {prices}\n"
+    "• Close: {close}\n"
+    "• Link: https://kalshi.com/markets/{ticker}"
+)
+
+
+def _col(row: sqlite3.Row, key: str, default: Any = None) -> Any:
+    """Read ``key`` from ``row``, or ``default`` when the query did not select that column."""
+    try:
+        return row[key]
+    except IndexError:
+        return default
+
+
 def _market_markdown(row: sqlite3.Row) -> str:
-    data = dict(row)
-    url = f"https://polymarket.com/event/{data.get('slug')}" if data.get("slug") else "n/a"
-    volume = data.get("volume") or 0
-    liquidity = data.get("liquidity") or 0
-
-    section_parts = [
-        data.get("domain") or "",
-        data.get("section") or "",
-        data.get("subsection") or "",
-    ]
-    hierarchy = " › ".join(part for part in section_parts if part)
-
-    return dedent(
-        f"""
-        **{data.get('title')}**
-        • ID: `{data.get('id')}`
-        • Slug: `{data.get('slug')}`
-        • Category: {hierarchy or 'n/a'}
-        • Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}
-        • Last Trade: {_format_timestamp(data.get('last_trade_date'))}
-        • Updated: {_format_timestamp(data.get('updated_at'))}
-        • Outcomes:
-        {_format_price_points(data.get('outcome_prices'))}
-        • Link: {url}
-        """
-    ).strip()
+    # Index the Row directly: copying every row into a dict just to .get() from it costs
+    # more than the formatting itself.
+    slug = row["slug"]
+    url = f"https://polymarket.com/event/{slug}" if slug else "n/a"
+    hierarchy = " › ".join(
+        part for part in (row["domain"], row["section"], row["subsection"]) if part
+    )
+    # Prefer the copy rendered at write time when the row was joined with events_formatted.
+    prices = _col(row, "prices_md") or format_price_points(row["outcome_prices"])
+
+    return _MARKET_TMPL.format(
+        title=row["title"],
+        id=row["id"],
+        slug=slug,
+        hierarchy=hierarchy or "n/a",
+        volume=row["volume"] or 0,
+        liquidity=row["liquidity"] or 0,
+        last_trade=_format_timestamp(row["last_trade_date"]),
+        updated=_format_timestamp(row["updated_at"]),
+        prices=prices,
+        url=url,
+    )
+
+
+def _render_numbered(rows: Iterable[sqlite3.Row], render: Callable[[sqlite3.Row], str]) -> str:
+    """Render a whole result set as numbered markdown blocks in one pass.
+
+    Listing tools return at most a few dozen rows, so one list-join over ``render`` beats
+    handing the batch to a dataframe library whose setup alone costs more than formatting.
+    """
+    return "\n\n".join([f"{idx}. {render(row)}" for idx, row in enumerate(rows, 1)])
+
+
+def _render_query(
+    db_key: str, sql: str, params: Sequence[Any], render: Callable[[sqlite3.Row], str]
+) -> str:
+    """Run ``sql`` and render rows as the cursor steps, without a fetchall() list of Rows.
+
+    Returns an empty string when the query matched nothing.
+    """
+    return _render_numbered(_get_conn(db_key).execute(sql, params), render)
 
 
-def _get_openai_client() -> OpenAI:
-    """Return a cached OpenAI client instance."""
+def _get_openai_client() -> AsyncOpenAI:
+    """Return a cached async OpenAI client sharing one pooled HTTP/2 connection set."""
     global _openai_client
     if _openai_client is not None:
         return _openai_client
@@ -225,11 +370,18 @@ def _get_openai_client() -> OpenAI:
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set; ChatGPT market analysis is unavailable.")
 
-    _openai_client = OpenAI(api_key=api_key)
+    _openai_client = AsyncOpenAI(
+        api_key=api_key,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(60.0),
+        ),
+    )
     return _openai_client
 
 
-_STOPWORDS = {
+_STOPWORDS = frozenset({
     "a",
     "an",
     "and",
@@ -270,100 +422,204 @@ _STOPWORDS = {
     "show",
     "list",
     "give",
-}
+})
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
 
 
 def _extract_keywords(text: str, limit: int = 6) -> List[str]:
     """Extract rough keywords from user input for SQL filtering."""
-    tokens = re.findall(r"[a-z0-9']+", text.lower())
-    keywords: List[str] = []
-    for token in tokens:
+    # A dict keeps first-seen order and gives O(1) duplicate checks.
+    keywords: Dict[str, None] = {}
+    for token in _TOKEN_RE.findall(text.lower()):
         normalized = token.strip("'")
-        if (
-            len(normalized) >= 3
-            and normalized not in _STOPWORDS
-            and normalized not in keywords
-        ):
-            keywords.append(normalized)
-        if len(keywords) >= limit:
-            break
-    return keywords
+        if len(normalized) >= 3 and normalized not in _STOPWORDS and normalized not in keywords:
+            keywords[normalized] = None
+            if len(keywords) >= limit:
+                break
+    return list(keywords)
+
+
+# SQLite's LIKE already folds ASCII case (the same range LOWER() handles), so the
+# filters compare columns directly and stay free of per-row function calls.
+_CONTEXT_KEYWORD_FILTER = (
+    "(title LIKE ? OR description LIKE ? OR slug LIKE ? "
+    "OR domain LIKE ? OR section LIKE ? OR subsection LIKE ?)"
+)
+# Any keyword may match any indexed column; best-ranked (bm25) markets come first.
+_CONTEXT_FTS_SQL = """
+    SELECT e.id, e.slug, e.title, e.domain, e.section, e.subsection, e.volume, e.liquidity,
+           e.updated_at
+    FROM events_fts
+    JOIN events e ON e.rowid = events_fts.rowid
+    WHERE events_fts MATCH ? AND e.is_active = 1
+    ORDER BY bm25(events_fts), COALESCE(e.volume, 0) DESC
+    LIMIT ?
+"""
+_CONTEXT_FALLBACK_SQL = """
+    SELECT id, slug, title, domain, section, subsection, volume, liquidity, updated_at
+    FROM events
+    WHERE is_active = 1
+    ORDER BY volume DESC NULLS LAST
+    LIMIT ?
+"""
+
+
+@lru_cache(maxsize=16)
+def _context_query(keyword_count: int) -> str:
+    """Render the context query for ``keyword_count`` keywords (one template per count)."""
+    filters = ["is_active = 1"]
+    if keyword_count:
+        filters.append("(" + " OR ".join([_CONTEXT_KEYWORD_FILTER] * keyword_count) + ")")
+    return f"""
+        SELECT id, slug, title, domain, section, subsection, volume, liquidity, updated_at
+        FROM events
+        WHERE {' AND '.join(filters)}
+        ORDER BY volume DESC NULLS LAST, datetime(COALESCE(updated_at, last_trade_date)) DESC
+        LIMIT ?
+    """
 
 
 def _fetch_market_context(question: str, limit: int = 15) -> List[sqlite3.Row]:
     """Return a compact set of markets relevant to the user's question."""
     keywords = _extract_keywords(question)
 
-    params: List[Any] = []
-    filters = ["is_active = 1"]
-
+    rows = None
     if keywords:
-        keyword_clauses = []
-        for kw in keywords:
-            like = f"%{kw}%"
-            keyword_clauses.append(
-                "(LOWER(title) LIKE ? OR LOWER(description) LIKE ? OR LOWER(slug) LIKE ? "
-                "OR LOWER(domain) LIKE ? OR LOWER(section) LIKE ? OR LOWER(subsection) LIKE ?)"
-            )
-            params.extend([like, like, like, like, like, like])
-        filters.append("(" + " OR ".join(keyword_clauses) + ")")
-
-    sql = f"""
-        SELECT id, slug, title, domain, section, subsection, volume, liquidity, updated_at
-        FROM events
-        WHERE {' AND '.join(filters)}
-        ORDER BY COALESCE(volume, 0) DESC, datetime(COALESCE(updated_at, last_trade_date)) DESC
-        LIMIT ?
-    """
-    params.append(limit)
+        match = " OR ".join(f'"{kw}"*' for kw in keywords)
+        try:
+            rows = _fetch_rows(_CONTEXT_FTS_SQL, (match, limit))
+        except sqlite3.OperationalError:
+            rows = None  # Replica predates the FTS migration.
 
-    rows = _fetch_rows(sql, params)
+    if rows is None:
+        params: List[Any] = []
+        for kw in keywords:
+            params.extend([f"%{kw}%"] * 6)
+        params.append(limit)
+        rows = _fetch_rows(_context_query(len(keywords)), params)
     if rows:
         return rows
 
     # Fallback: top markets by volume when no keyword hits
-    return _fetch_rows(
-        """
-        SELECT id, slug, title, domain, section, subsection, volume, liquidity, updated_at
-        FROM events
-        WHERE is_active = 1
-        ORDER BY COALESCE(volume, 0) DESC
-        LIMIT ?
-        """,
-        (min(limit, 20),),
-    )
+    return _fetch_rows(_CONTEXT_FALLBACK_SQL, (min(limit, 20),))
+
+
+_CTX_TMPL = (
+    "{idx}. {title}\n"
+    "   • Category: {hierarchy}\n"
+    "   • Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}\n"
+    "   • URL: {url}"
+)
 
 
 def _format_chatgpt_context(rows: Iterable[sqlite3.Row]) -> str:
     """Format market rows into concise bullet points for ChatGPT prompts."""
     lines = []
+    append = lines.append
     for idx, row in enumerate(rows, 1):
-        data = dict(row)
         hierarchy = " › ".join(
-            part
-            for part in (
-                data.get("domain"),
-                data.get("section"),
-                data.get("subsection"),
-            )
-            if part
+            part for part in (row["domain"], row["section"], row["subsection"]) if part
         )
-        volume = data.get("volume") or 0
-        liquidity = data.get("liquidity") or 0
-        url = f"https://polymarket.com/event/{data.get('slug')}" if data.get("slug") else "n/a"
-        lines.append(
-            dedent(
-                f"""
-                {idx}. {data.get('title')}
-                   • Category: {hierarchy or 'n/a'}
-                   • Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}
-                   • URL: {url}
-                """
-            ).strip()
+        slug = row["slug"]
+        append(
+            _CTX_TMPL.format(
+                idx=idx,
+                title=row["title"],
+                hierarchy=hierarchy or "n/a",
+                volume=row["volume"] or 0,
+                liquidity=row["liquidity"] or 0,
+                url=f"https://polymarket.com/event/{slug}" if slug else "n/a",
+            )
         )
     return "\n".join(lines) if lines else "No specific markets matched the query."
 
 
+_MARKET_COLUMNS = (
+    "e.id, e.slug, e.title, e.domain, e.section, e.subsection, e.volume, e.liquidity, "
+    "e.outcome_prices, e.last_trade_date, e.updated_at"
+)
+
+
+def _market_query(source: str, where: str, order: str, formatted: bool) -> str:
+    """Render a market listing query over ``source`` (which aliases events as ``e``).
+
+    The ``formatted`` variant also pulls the price block rendered at write time, but
+    only while it still matches the row's current outcome_prices.
+    """
+    if formatted:
+        return (
+            f"SELECT {_MARKET_COLUMNS}, f.prices_md FROM {source} "
+            "LEFT JOIN events_formatted f "
+            "ON f.id = e.id AND f.outcome_prices = e.outcome_prices "
+            f"WHERE {where} ORDER BY {order} LIMIT ?"
+        )
+    return f"SELECT {_MARKET_COLUMNS} FROM {source} WHERE {where} ORDER BY {order} LIMIT ?"
+
+
+# Written to match the partial indexes on events so SQLite can skip the sort step.
+_TOP_ORDERS = {
+    "volume": "e.volume DESC NULLS LAST",
+    "liquidity": "e.liquidity DESC NULLS LAST",
+    "updated": "COALESCE(e.updated_at, e.last_trade_date) DESC",
+}
+
+# Every (sort_by, has domain filter, formatted) combination is rendered once at import so
+# the statement text is stable and stays in the connection's prepared-statement cache.
+_TOP_QUERIES = {
+    (sort, has_domain, formatted): _market_query(
+        "events e",
+        "e.is_active = 1"
+        + (
+            " AND (e.domain LIKE ? OR e.section LIKE ? OR e.subsection LIKE ?)"
+            if has_domain
+            else ""
+        ),
+        order,
+        formatted,
+    )
+    for sort, order in _TOP_ORDERS.items()
+    for has_domain in (False, True)
+    for formatted in (False, True)
+}
+
+# Keyed by (include_inactive, formatted).
+_SEARCH_FTS_QUERIES = {
+    (include_inactive, formatted): _market_query(
+        "events_fts JOIN events e ON e.rowid = events_fts.rowid",
+        "events_fts MATCH ?" + ("" if include_inactive else " AND e.is_active = 1"),
+        "COALESCE(e.volume, 0) DESC",
+        formatted,
+    )
+    for include_inactive in (False, True)
+    for formatted in (False, True)
+}
+_SEARCH_LIKE_QUERIES = {
+    (include_inactive, formatted): _market_query(
+        "events e",
+        "(e.title LIKE ? OR e.description LIKE ? OR e.slug LIKE ?)"
+        + ("" if include_inactive else " AND e.is_active = 1"),
+        "e.volume DESC NULLS LAST",
+        formatted,
+    )
+    for include_inactive in (False, True)
+    for formatted in (False, True)
+}
+
+
+def _render_market_rows(queries: Dict[Any, str], key: tuple, params: Sequence[Any]) -> str:
+    """Run a listing query joined with ``events_formatted`` and render its rows.
+
+    Replicas synced before that table existed fall back to the plain variant.
+    """
+    with ReadTracker():
+        try:
+            return _render_query("polymarket", queries[key + (True,)], params, _market_markdown)
+        except sqlite3.OperationalError:
+            return _render_query("polymarket", queries[key + (False,)], params, _market_markdown)
+
+
 @mcp.tool()
 async def list_top_markets(
     limit: Optional[int] = None,
@@ -371,41 +627,20 @@ async def list_top_markets(
     sort_by: str = "volume",
 ) -> str:
     """Return top active markets sorted by volume, liquidity, or recency."""
-    order_clauses = {
-        "volume": "COALESCE(volume, 0) DESC",
-        "liquidity": "COALESCE(liquidity, 0) DESC",
-        "updated": "datetime(COALESCE(updated_at, last_trade_date)) DESC",
-    }
-    order = order_clauses.get(sort_by.lower())
-    if not order:
+    key = (sort_by.lower(), bool(domain_filter))
+    if key + (True,) not in _TOP_QUERIES:
         raise ValueError(f"Unsupported sort_by '{sort_by}'. Use volume, liquidity, or updated.")
 
     params: List[Any] = []
-    filters = ["is_active = 1"]
-
     if domain_filter:
-        like = f"%{domain_filter.lower()}%"
-        filters.append(
-            "(LOWER(domain) LIKE ? OR LOWER(section) LIKE ? OR LOWER(subsection) LIKE ?)"
-        )
+        like = f"%{domain_filter}%"
         params.extend([like, like, like])
-
-    sql = f"""
-        SELECT id, slug, title, domain, section, subsection, volume, liquidity,
-               outcome_prices, last_trade_date, updated_at
-        FROM events
-        WHERE {' AND '.join(filters)}
-        ORDER BY {order}
-        LIMIT ?
-    """
     params.append(_get_default_limit(limit))
 
-    rows = _fetch_rows(sql, params)
-    if not rows:
-        return "No active markets matched the requested filters."
-
-    sections = [f"{idx+1}. {_market_markdown(row)}" for idx, row in enumerate(rows)]
-    return "\n\n".join(sections)
+    return (
+        _render_market_rows(_TOP_QUERIES, key, params)
+        or "No active markets matched the requested filters."
+    )
 
 
 @mcp.tool()
@@ -418,36 +653,34 @@ async def search_markets(
     if not query or len(query.strip()) < 2:
         raise ValueError("Provide a search query with at least two characters.")
 
-    params: List[Any] = []
-    filters = ["(LOWER(title) LIKE ? OR LOWER(description) LIKE ? OR LOWER(slug) LIKE ?)"]
-    like = f"%{query.lower()}%"
-    params.extend([like, like, like])
+    limit_value = _get_default_limit(limit)
+    text = None
+    if re.search(r"\w", query):
+        # Prefix phrase match on the FTS index, limited to the columns this tool has always
+        # searched; quotes are doubled per FTS5 string syntax.
+        match = '{title description slug} : "' + query.strip().replace('"', '""') + '"*'
+        try:
+            text = _render_market_rows(
+                _SEARCH_FTS_QUERIES, (include_inactive,), (match, limit_value)
+            )
+        except sqlite3.OperationalError:
+            text = None  # Replica predates the FTS migration.
 
-    if not include_inactive:
-        filters.append("is_active = 1")
+    if text is None:
+        like = f"%{query}%"
+        text = _render_market_rows(
+            _SEARCH_LIKE_QUERIES, (include_inactive,), (like, like, like, limit_value)
+        )
 
-    sql = f"""
-        SELECT id, slug, title, domain, section, subsection, volume, liquidity,
-               outcome_prices, last_trade_date, updated_at
-        FROM events
-        WHERE {' AND '.join(filters)}
-        ORDER BY COALESCE(volume, 0) DESC
-        LIMIT ?
-    """
-    params.append(_get_default_limit(limit))
+    if text:
+        return text
 
-    rows = _fetch_rows(sql, params)
-    
     # If no SQL results, fall back to intelligent bot for semantic search
-    if not rows:
-        try:
-            bot = _get_gemini_bot()
-            return bot.process_query(query.strip())
-        except Exception as exc:
-            return f"No exact matches found. Intelligent search also failed: {exc}"
-
-    results = [f"{idx+1}. {_market_markdown(row)}" for idx, row in enumerate(rows)]
-    return "\n\n".join(results)
+    try:
+        bot = _get_gemini_bot()
+        return await _run_bot_query(_gemini_bot_lock, bot, query.strip())
+    except Exception as exc:
+        return f"No exact matches found. Intelligent search also failed: {exc}"
 
 
 @mcp.tool()
@@ -482,13 +715,11 @@ async def market_details(
     if not row:
         return "Market not found."
 
-    data = dict(row)
-
     aux_fields = [
-        ("Best Bid", data.get("best_bid")),
-        ("Best Ask", data.get("best_ask")),
-        ("Open Interest", data.get("open_interest")),
-        ("Last Trade Price", data.get("last_trade_price")),
+        ("Best Bid", _col(row, "best_bid")),
+        ("Best Ask", _col(row, "best_ask")),
+        ("Open Interest", _col(row, "open_interest")),
+        ("Last Trade Price", _col(row, "last_trade_price")),
     ]
 
     extra_lines = []
@@ -506,18 +737,35 @@ async def market_details(
 @mcp.tool()
 async def market_stats() -> str:
     """Return aggregate statistics for the prediction market dataset."""
-    totals = _fetch_rows(
-        """
-        SELECT
-            COUNT(*) AS total_events,
-            SUM(CASE WHEN is_active = 1 THEN 1 ELSE 0 END) AS active_events,
-            SUM(volume) AS total_volume,
-            AVG(liquidity) AS avg_liquidity
-        FROM events
-        """,
-        (),
-        fetch_one=True,
-    )
+    cached = _STATS_CACHE.get("polymarket")
+    if cached is not None:
+        return cached
+    result = _market_stats_text()
+    _STATS_CACHE.set("polymarket", result)
+    return result
+
+
+_TOP_DOMAINS_ORDER = "ORDER BY CASE WHEN volume IS NULL THEN 1 ELSE 0 END, volume DESC LIMIT 10"
+
+# (totals, by-domain) sources for market_stats, cheapest first: the summary tables the sync
+# service materializes, the views the schema migration adds, then the raw aggregates for
+# replicas that have neither.
+_STATS_SOURCES = (
+    ("events_stats", "events_domain_stats"),
+    ("v_market_stats", "v_market_stats_by_domain"),
+    (f"({EVENTS_STATS_SQL})", f"({EVENTS_DOMAIN_STATS_SQL})"),
+)
+
+
+def _market_stats_text() -> str:
+    for attempt, (totals_source, domain_source) in enumerate(_STATS_SOURCES, 1):
+        try:
+            totals = _fetch_rows(f"SELECT * FROM {totals_source}", fetch_one=True)
+            by_domain = _fetch_rows(f"SELECT * FROM {domain_source} {_TOP_DOMAINS_ORDER}")
+            break
+        except sqlite3.OperationalError:
+            if attempt == len(_STATS_SOURCES):
+                raise
 
     if not totals:
         return "No market data available."
@@ -527,17 +775,6 @@ async def market_stats() -> str:
     total_volume = float(totals["total_volume"] or 0)
     avg_liquidity = float(totals["avg_liquidity"] or 0)
 
-    by_domain = _fetch_rows(
-        """
-        SELECT domain, COUNT(*) AS count, SUM(volume) AS volume
-        FROM events
-        WHERE is_active = 1
-        GROUP BY domain
-        ORDER BY CASE WHEN volume IS NULL THEN 1 ELSE 0 END, volume DESC
-        LIMIT 10
-        """
-    )
-
     lines = [
         "**Dataset Overview**",
         f"- Total events: {int(total_events):,}",
@@ -566,11 +803,41 @@ async def intelligent_market_analysis(question: str) -> str:
     if not question or len(question.strip()) < 4:
         raise ValueError("Provide a question with at least four characters.")
 
+    key = _question_key(question)
+    cached = _ANSWER_CACHE.get(key)
+    if cached is not None:
+        return cached
+    cached = get_answer("gemini", question)
+    if cached is not None:
+        _ANSWER_CACHE.set(key, cached)
+        return cached
+
     bot = _get_gemini_bot()
     try:
-        return bot.process_query(question.strip())
+        # Error replies raise instead of coming back as text, so they never reach the caches.
+        answer = await _run_bot_query(_gemini_bot_lock, bot, question.strip(), raise_errors=True)
+    except QueryFailed as exc:
+        return str(exc)
     except Exception as exc:  # pragma: no cover
         return f"Intelligent analysis failed: {exc}"
+    _ANSWER_CACHE.set(key, answer)
+    store_answer("gemini", question, answer)
+    return answer
+
+
+# Everything that never changes comes first and is byte-identical across calls, so the
+# provider's automatic prompt-prefix caching can reuse it; per-call context and the
+# question go last.
+_SYSTEM_MSG = (
+    "You are an expert on prediction markets. "
+    "Ground answers in the supplied Polymarket context."
+)
+_PROMPT_PREFIX = (
+    "You are a prediction market analyst. Use only the market context provided below plus "
+    "the user question.\n"
+    "Prefer concrete market references, relevant metrics, and clear takeaways. If the context "
+    "lacks an answer, say so.\n\n"
+)
 
 
 @mcp.tool()
@@ -579,51 +846,38 @@ async def chatgpt_market_analysis(question: str, limit: Optional[int] = None, mo
     if not question or len(question.strip()) < 4:
         raise ValueError("Provide a question with at least four characters.")
 
+    model_name = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    # The context size changes the answer, so it is part of the cache namespace.
+    cache_model = f"openai:{model_name}:{limit or 15}"
+    header = "**ChatGPT Analysis**"
+    cached = get_answer(cache_model, question)
+    if cached is not None:
+        return f"{header}\n\n{cached}"
+
     rows = _fetch_market_context(question, limit or 15)
     context = _format_chatgpt_context(rows)
-    prompt = dedent(
-        f"""
-        You are a prediction market analyst. Use only the market context provided below plus the user question.
-        Prefer concrete market references, relevant metrics, and clear takeaways. If the context lacks an answer, say so.
-
-        User question:
-        {question.strip()}
-
-        Market context:
-        {context}
-        """
-    ).strip()
+    prompt = f"{_PROMPT_PREFIX}Market context:\n{context}\n\nUser question:\n{question.strip()}"
 
     client = _get_openai_client()
-    model_name = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
-    loop = asyncio.get_running_loop()
 
-    def _call_openai() -> str:
-        response = client.chat.completions.create(
+    try:
+        response = await client.chat.completions.create(
             model=model_name,
             temperature=0.2,
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert on prediction markets. "
-                        "Ground answers in the supplied Polymarket context."
-                    ),
-                },
+                {"role": "system", "content": _SYSTEM_MSG},
                 {"role": "user", "content": prompt},
             ],
         )
-        if not response.choices:
-            return "ChatGPT returned no response."
-        return response.choices[0].message.content.strip()
-
-    try:
-        answer = await loop.run_in_executor(None, _call_openai)
     except Exception as exc:  # pragma: no cover
         return f"ChatGPT analysis failed: {exc}"
+    if not response.choices:
+        return f"{header}\n\nChatGPT returned no response."
+    answer = (response.choices[0].message.content or "").strip()
+    if not answer:
+        return f"{header}\n\nChatGPT returned an empty response."
 
-    header = "**ChatGPT Analysis**"
+    store_answer(cache_model, question, answer)
     return f"{header}\n\n{answer}"
 
 
@@ -640,50 +894,169 @@ def _ensure_kalshi_database() -> Path:
     return path
 
 
-def _fetch_kalshi_rows(sql: str, params: Iterable[Any] = (), fetch_one: bool = False) -> Any:
+def _fetch_kalshi_rows(sql: str, params: Sequence[Any] = (), fetch_one: bool = False) -> Any:
     """Run a read-only SQL query on Kalshi database."""
-    database = _ensure_kalshi_database()
+    return _fetch("kalshi", sql, params, fetch_one)
 
-    with closing(sqlite3.connect(database)) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(sql, tuple(params))
-        return cursor.fetchone() if fetch_one else cursor.fetchall()
+
+def _kalshi_price_str(yes_bid: Any, yes_ask: Any) -> str:
+    if yes_bid is not None and yes_ask is not None:
+        return f"Yes: {yes_bid}¢ bid / {yes_ask}¢ ask"
+    if yes_bid is not None:
+        return f"Yes: {yes_bid}¢ bid"
+    if yes_ask is not None:
+        return f"Yes: {yes_ask}¢ ask"
+    return "n/a"
 
 
 def _kalshi_market_markdown(row: sqlite3.Row) -> str:
     """Format a Kalshi market row as markdown."""
-    data = dict(row)
-    ticker = data.get("ticker", "n/a")
-    volume = data.get("volume") or 0
-    liquidity = data.get("liquidity") or 0
-    yes_bid = data.get("yes_bid")
-    yes_ask = data.get("yes_ask")
-
-    # Format prices
-    price_str = "n/a"
-    if yes_bid is not None and yes_ask is not None:
-        price_str = f"Yes: {yes_bid}¢ bid / {yes_ask}¢ ask"
-    elif yes_bid is not None:
-        price_str = f"Yes: {yes_bid}¢ bid"
-    elif yes_ask is not None:
-        price_str = f"Yes: {yes_ask}¢ ask"
-
-    status = data.get("status", "unknown")
-    category = data.get("category") or "Uncategorized"
-
-    return dedent(
-        f"""
-        **{data.get('title')}**
-        • Ticker: `{ticker}`
-        • Category: {category}
-        • Status: {status}
-        • Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}
-        • Prices: {price_str}
-        • Close: {_format_timestamp(data.get('close_time'))}
-        • Link: https://kalshi.com/markets/{ticker}
+    return _KALSHI_MARKET_TMPL.format(
+        title=row["title"] or "n/a",
+        contract_info="",
+        ticker=row["ticker"],
+        category=row["category"] or "Uncategorized",
+        status=row["status"] or "unknown",
+        volume=row["volume"] or 0,
+        liquidity=row["liquidity"] or 0,
+        prices=_kalshi_price_str(row["yes_bid"], row["yes_ask"]),
+        close=_format_timestamp(row["close_time"]),
+    )
+
+
+def _kalshi_contract_markdown(row: sqlite3.Row) -> str:
+    """Format one row of the per-contract Kalshi listing as markdown."""
+    return _KALSHI_MARKET_TMPL.format(
+        title=row["title"] or "n/a",
+        contract_info="",
+        ticker=row["ticker"],
+        category=row["category"] or "Uncategorized",
+        status=row["status"] or "unknown",
+        volume=row["total_volume"] or 0,
+        liquidity=row["total_liquidity"] or 0,
+        prices=_kalshi_price_str(row["yes_bid"], row["yes_ask"]),
+        close=_format_timestamp(row["close_time"]),
+    )
+
+
+def _sql_round_half_even(expr: str) -> str:
+    """SQL rounding ``expr`` to an integer the way ``format(x, ".0f")`` does (ties to even)."""
+    trunc = f"CAST({expr} AS INTEGER)"
+    frac = f"abs({expr} - {trunc})"
+    return (
+        f"({trunc} + CASE WHEN {frac} > 0.5 OR ({frac} = 0.5 AND {trunc} % 2 != 0) "
+        f"THEN CASE WHEN {expr} < 0 THEN -1 ELSE 1 END ELSE 0 END)"
+    )
+
+
+# Renders a grouped Kalshi event like _KALSHI_MARKET_TMPL, inside SQLite, so the default
+# list path hands Python finished strings instead of rows to pick apart. Close times that
+# are neither a full ISO datetime nor a bare date are shown raw, where _format_timestamp
+# would still try datetime.fromisoformat(); Kalshi always sends full ISO datetimes. Totals
+# between -0.5 and 0 print as 0, where Python prints -0.
+_KALSHI_GROUPED_MARKDOWN = f"""printf(
+    '**%s**%s
+• Ticker: `%s`
+• Category: %s
+• Status: %s
+• Volume: $%,d | Liquidity: $%,d
+• Prices: %s
+• Close: %s
+• Link: https://kalshi.com/markets/%s',
+    COALESCE(NULLIF(title, ''), 'n/a'),
+    CASE WHEN contract_count > 1 THEN ' (' || contract_count || ' contracts)' ELSE '' END,
+    ticker,
+    COALESCE(NULLIF(category, ''), 'Uncategorized'),
+    COALESCE(NULLIF(status, ''), 'unknown'),
+    {_sql_round_half_even("total_volume")},
+    {_sql_round_half_even("total_liquidity")},
+    CASE
+        WHEN yes_bid IS NOT NULL AND yes_ask IS NOT NULL
+            THEN 'Yes: ' || yes_bid || '¢ bid / ' || yes_ask || '¢ ask'
+        WHEN yes_bid IS NOT NULL THEN 'Yes: ' || yes_bid || '¢ bid'
+        WHEN yes_ask IS NOT NULL THEN 'Yes: ' || yes_ask || '¢ ask'
+        ELSE 'n/a'
+    END,
+    CASE
+        WHEN close_time IS NULL OR close_time = '' THEN 'n/a'
+        WHEN close_time GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9][T ][0-9][0-9]:[0-9][0-9]*'
+            THEN substr(close_time, 1, 10) || ' ' || substr(close_time, 12, 5)
+        WHEN close_time GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+            AND date(julianday(close_time)) IS close_time
+            THEN close_time || ' 00:00'
+        ELSE close_time
+    END,
+    ticker
+)"""
+
+
+def _kalshi_list_query(order: str, has_category: bool, group_by_event: bool) -> str:
+    where = "is_active = 1" + (" AND category LIKE ?" if has_category else "")
+    if group_by_event:
+        # Group by event_ticker and sum volumes/liquidity, then render each group's markdown.
+        return f"""
+            WITH grouped AS (
+                SELECT
+                    event_ticker,
+                    MAX(ticker) as ticker,
+                    MAX(title) as title,
+                    MAX(category) as category,
+                    MAX(status) as status,
+                    SUM(COALESCE(volume, 0)) as total_volume,
+                    SUM(COALESCE(liquidity, 0)) as total_liquidity,
+                    MAX(yes_bid) as yes_bid,
+                    MAX(yes_ask) as yes_ask,
+                    MAX(close_time) as close_time,
+                    COUNT(*) as contract_count
+                FROM kalshi_markets
+                WHERE {where}
+                GROUP BY event_ticker
+                ORDER BY {order}
+                LIMIT ?
+            )
+            SELECT {_KALSHI_GROUPED_MARKDOWN} AS markdown
+            FROM grouped
+            ORDER BY {order}
         """
-    ).strip()
+    # Individual contracts
+    return f"""
+        SELECT ticker, title, category, status, volume as total_volume, liquidity as total_liquidity,
+               yes_bid, yes_ask, close_time
+        FROM kalshi_markets
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT ?
+    """
+
+
+_KALSHI_ORDERS = {
+    # (grouped order, per-contract order)
+    "volume": ("COALESCE(total_volume, 0) DESC", "COALESCE(volume, 0) DESC"),
+    "liquidity": ("COALESCE(total_liquidity, 0) DESC", "COALESCE(liquidity, 0) DESC"),
+    "close_time": ("datetime(close_time) ASC", "datetime(close_time) ASC"),
+}
+
+# Keyed by (sort_by, has category filter, group_by_event); rendered once at import.
+_KALSHI_LIST_QUERIES = {
+    (sort, has_category, grouped): _kalshi_list_query(
+        orders[0] if grouped else orders[1], has_category, grouped
+    )
+    for sort, orders in _KALSHI_ORDERS.items()
+    for has_category in (False, True)
+    for grouped in (False, True)
+}
+
+# Keyed by include_inactive.
+_KALSHI_SEARCH_QUERIES = {
+    include_inactive: (
+        "SELECT ticker, title, category, status, volume, liquidity, "
+        "yes_bid, yes_ask, close_time, open_interest FROM kalshi_markets "
+        "WHERE (title LIKE ? OR subtitle LIKE ?)"
+        + ("" if include_inactive else " AND is_active = 1")
+        + " ORDER BY COALESCE(volume, 0) DESC LIMIT ?"
+    )
+    for include_inactive in (False, True)
+}
 
 
 @mcp.tool()
@@ -701,102 +1074,21 @@ async def list_kalshi_markets(
         sort_by: Sort by 'volume', 'liquidity', or 'close_time'
         group_by_event: If True, groups contracts by event_ticker and sums volumes (default: True)
     """
-    order_clauses = {
-        "volume": "COALESCE(total_volume, 0) DESC" if group_by_event else "COALESCE(volume, 0) DESC",
-        "liquidity": "COALESCE(total_liquidity, 0) DESC" if group_by_event else "COALESCE(liquidity, 0) DESC",
-        "close_time": "datetime(close_time) ASC",
-    }
-    order = order_clauses.get(sort_by.lower())
-    if not order:
+    sql = _KALSHI_LIST_QUERIES.get((sort_by.lower(), bool(category_filter), bool(group_by_event)))
+    if sql is None:
         raise ValueError(f"Unsupported sort_by '{sort_by}'. Use volume, liquidity, or close_time.")
 
     params: List[Any] = []
-    filters = ["is_active = 1"]
-
     if category_filter:
-        filters.append("LOWER(category) LIKE ?")
-        params.append(f"%{category_filter.lower()}%")
-
-    if group_by_event:
-        # Group by event_ticker and sum volumes/liquidity
-        sql = f"""
-            SELECT
-                event_ticker,
-                MAX(ticker) as ticker,
-                MAX(title) as title,
-                MAX(category) as category,
-                MAX(status) as status,
-                SUM(COALESCE(volume, 0)) as total_volume,
-                SUM(COALESCE(liquidity, 0)) as total_liquidity,
-                SUM(COALESCE(open_interest, 0)) as total_open_interest,
-                MAX(yes_bid) as yes_bid,
-                MAX(yes_ask) as yes_ask,
-                MAX(close_time) as close_time,
-                COUNT(*) as contract_count
-            FROM kalshi_markets
-            WHERE {' AND '.join(filters)}
-            GROUP BY event_ticker
-            ORDER BY {order}
-            LIMIT ?
-        """
-    else:
-        # Original query - individual contracts
-        sql = f"""
-            SELECT ticker, title, category, status, volume as total_volume, liquidity as total_liquidity,
-                   yes_bid, yes_ask, close_time, open_interest as total_open_interest, 1 as contract_count
-            FROM kalshi_markets
-            WHERE {' AND '.join(filters)}
-            ORDER BY {order}
-            LIMIT ?
-        """
-
+        params.append(f"%{category_filter}%")
     params.append(_get_default_limit(limit))
 
-    rows = _fetch_kalshi_rows(sql, params)
-    if not rows:
-        return "No active Kalshi markets matched the requested filters."
-
-    sections = []
-    for idx, row in enumerate(rows):
-        data = dict(row)
-        # Format with grouped data
-        ticker = data.get("ticker", "n/a")
-        volume = data.get("total_volume") or 0
-        liquidity = data.get("total_liquidity") or 0
-        contract_count = data.get("contract_count", 1)
-
-        yes_bid = data.get("yes_bid")
-        yes_ask = data.get("yes_ask")
-
-        price_str = "n/a"
-        if yes_bid is not None and yes_ask is not None:
-            price_str = f"Yes: {yes_bid}¢ bid / {yes_ask}¢ ask"
-        elif yes_bid is not None:
-            price_str = f"Yes: {yes_bid}¢ bid"
-        elif yes_ask is not None:
-            price_str = f"Yes: {yes_ask}¢ ask"
-
-        status = data.get("status", "unknown")
-        category = data.get("category") or "Uncategorized"
-
-        contract_info = f" ({contract_count} contracts)" if group_by_event and contract_count > 1 else ""
-
-        market_str = dedent(
-            f"""
-            **{data.get('title')}**{contract_info}
-            • Ticker: `{ticker}`
-            • Category: {category}
-            • Status: {status}
-            • Volume: ${volume:,.0f} | Liquidity: ${liquidity:,.0f}
-            • Prices: {price_str}
-            • Close: {_format_timestamp(data.get('close_time'))}
-            • Link: https://kalshi.com/markets/{ticker}
-            """
-        ).strip()
-
-        sections.append(f"{idx+1}. {market_str}")
-
-    return "\n\n".join(sections)
+    # Grouped rows arrive as finished markdown; per-contract rows are formatted here.
+    render = itemgetter(0) if group_by_event else _kalshi_contract_markdown
+    return (
+        _render_query("kalshi", sql, params, render)
+        or "No active Kalshi markets matched the requested filters."
+    )
 
 
 @mcp.tool()
@@ -809,30 +1101,14 @@ async def search_kalshi_markets(
     if not query or len(query.strip()) < 2:
         raise ValueError("Provide a search query with at least two characters.")
 
-    params: List[Any] = []
-    filters = ["(LOWER(title) LIKE ? OR LOWER(subtitle) LIKE ?)"]
-    like = f"%{query.lower()}%"
-    params.extend([like, like])
-
-    if not include_inactive:
-        filters.append("is_active = 1")
+    like = f"%{query}%"
+    sql = _KALSHI_SEARCH_QUERIES[bool(include_inactive)]
+    params = (like, like, _get_default_limit(limit))
 
-    sql = f"""
-        SELECT ticker, title, category, status, volume, liquidity,
-               yes_bid, yes_ask, close_time, open_interest
-        FROM kalshi_markets
-        WHERE {' AND '.join(filters)}
-        ORDER BY COALESCE(volume, 0) DESC
-        LIMIT ?
-    """
-    params.append(_get_default_limit(limit))
-
-    rows = _fetch_kalshi_rows(sql, params)
-    if not rows:
-        return f"No Kalshi markets found matching '{query}'."
-
-    results = [f"{idx+1}. {_kalshi_market_markdown(row)}" for idx, row in enumerate(rows)]
-    return "\n\n".join(results)
+    return (
+        _render_query("kalshi", sql, params, _kalshi_market_markdown)
+        or f"No Kalshi markets found matching '{query}'."
+    )
 
 
 @mcp.tool()
@@ -882,6 +1158,15 @@ async def kalshi_market_details(ticker: str) -> str:
 @mcp.tool()
 async def kalshi_market_stats() -> str:
     """Return aggregate statistics for the Kalshi market dataset."""
+    cached = _STATS_CACHE.get("kalshi")
+    if cached is not None:
+        return cached
+    result = _kalshi_market_stats_text()
+    _STATS_CACHE.set("kalshi", result)
+    return result
+
+
+def _kalshi_market_stats_text() -> str:
     totals = _fetch_kalshi_rows(
         """
         SELECT
@@ -977,11 +1262,36 @@ async def intelligent_search_multi_platform(
         else:
             modified_question = question.strip()
 
-        return bot.process_query(modified_question)
+        # The bot makes several blocking Gemini calls; keep the event loop serving other tools.
+        return await _run_bot_query(_multi_platform_bot_lock, bot, modified_question)
     except Exception as exc:  # pragma: no cover
         return f"Multi-platform intelligent search failed: {exc}"
 
 
+def _prewarm_bots() -> None:
+    """Build the Gemini bots up front so the first intelligent tool call skips setup."""
+    for factory in (_get_gemini_bot, _get_multi_platform_bot):
+        try:
+            factory()
+        except Exception as exc:  # The tools report the same error lazily when called.
+            print(f"Skipping bot prewarm: {exc}", file=sys.stderr)
+
+
+# Parsed .env files keyed by path: (st_mtime_ns, values). Reconnecting stdio clients
+# build a new server each time; an unchanged file is applied without being re-read.
+_ENV_CACHE: Dict[Path, tuple] = {}
+
+
+def _apply_env_file(env_config: Path) -> None:
+    """Apply ``env_config`` to ``os.environ``, overriding existing values."""
+    mtime_ns = env_config.stat().st_mtime_ns
+    cached = _ENV_CACHE.get(env_config)
+    if cached is None or cached[0] != mtime_ns:
+        values = {key: value for key, value in dotenv_values(env_config).items() if value is not None}
+        cached = _ENV_CACHE[env_config] = (mtime_ns, values)
+    os.environ.update(cached[1])
+
+
 class PredictionMCPServer:
     """CLI-friendly wrapper mirroring the Alpaca MCP server entrypoint."""
 
@@ -992,11 +1302,23 @@ class PredictionMCPServer:
         self.config_file = env_config
 
         if env_config.exists():
-            load_dotenv(env_config, override=True)
+            _apply_env_file(env_config)
         else:
             load_dotenv(override=False)
+        _get_db_path.cache_clear()
+        _get_kalshi_db_path.cache_clear()
 
     def run(self, transport: str = "stdio", host: str = "127.0.0.1", port: int = 8001) -> None:
+        # Fail at startup rather than on the first tool call; connections are opened lazily
+        # per thread afterwards and never stat the file again.
+        _ensure_database()
+        if not _get_kalshi_db_path().exists():
+            print(
+                f"Kalshi database not found at {_get_kalshi_db_path()}; Kalshi tools will fail.",
+                file=sys.stderr,
+            )
+        if os.getenv("PREDICTION_PREWARM_BOTS", "").lower() in {"1", "true", "yes"}:
+            _prewarm_bots()
         if transport == "stdio":
             mcp.run()
         else:
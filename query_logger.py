@@ -7,21 +7,173 @@ Logs all query details to query_execution.log with detailed information about:
 - All AI prompts and responses (for AI strategy)
 - Results count and execution time
 """
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Marker a QueryLogger puts on the queue to have the writer thread flush its buffers.
+_FLUSH = object()
+# Writer thread per log file, keyed by logger name, and how many open QueryLoggers use it.
+_LISTENERS = {}
+_LISTENER_USERS = {}
+_LISTENERS_LOCK = threading.Lock()
+
+
+class _TruncateRequest:
+    """Queued by clear_log_file(); the writer thread empties the file, then sets ``done``."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """File handler that collects formatted entries and writes them in one go on flush().
+
+    A query logs dozens of short lines; writing them together at the end of the query
+    replaces dozens of tiny writes. Entries are also written once ``flush_bytes`` pile up.
+    """
+
+    def __init__(self, filename, flush_bytes=1 << 17):
+        super().__init__(filename, encoding="utf-8", delay=True)
+        self._pending = []
+        self._pending_bytes = 0
+        self._flush_bytes = flush_bytes
+
+    def emit(self, record):
+        try:
+            text = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending.append(text)
+        self._pending_bytes += len(text)
+        if self._pending_bytes >= self._flush_bytes:
+            self._write_pending()
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._write_pending()
+        finally:
+            self.release()
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.writelines(self._pending)
+        self.stream.flush()
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def truncate(self):
+        """Drop unwritten entries and empty the log file."""
+        self.acquire()
+        try:
+            self._pending.clear()
+            self._pending_bytes = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0)
+            self.stream.truncate()
+        finally:
+            self.release()
+
+
+class _BlockingQueueHandler(QueueHandler):
+    """Queue handler that hands records over unformatted and waits when the queue is full."""
+
+    def prepare(self, record):
+        # Records never leave the process, so formatting can happen on the writer thread.
+        return record
+
+    def enqueue(self, record):
+        self.queue.put(record)
+
+
+class _WriterListener(QueueListener):
+    """Background writer that also honours flush requests queued by QueryLogger."""
+
+    def handle(self, record):
+        if record is _FLUSH:
+            for handler in self.handlers:
+                handler.flush()
+        elif isinstance(record, _TruncateRequest):
+            try:
+                for handler in self.handlers:
+                    if isinstance(handler, _BufferedFileHandler):
+                        handler.truncate()
+            finally:
+                record.done.set()
+        else:
+            super().handle(record)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+            for handler in self.handlers:
+                handler.flush()
+
+
+def _get_logger(log_file):
+    """Return the shared logger writing to ``log_file``, starting its writer thread once.
+
+    Callers only enqueue records; a daemon thread formats them and does all console and
+    file I/O, so a slow disk or terminal never stalls query handling. Each call counts as
+    one user of the writer thread until that QueryLogger is closed.
+    """
+    with _LISTENERS_LOCK:
+        logger = _open_logger(log_file)
+        _LISTENER_USERS[logger.name] = _LISTENER_USERS.get(logger.name, 0) + 1
+    return logger
+
+
+def _open_logger(log_file):
+    """Return the logger for ``log_file``, creating its handlers and writer thread if needed."""
+    logger = logging.getLogger(f"query_exec.{os.path.abspath(log_file)}")
+    if not logger.handlers:
+        formatter = logging.Formatter("%(message)s")
+        # The handler keeps the file open instead of reopening it for every entry.
+        file_handler = _BufferedFileHandler(log_file)
+        console_handler = logging.StreamHandler(sys.stdout)
+        # Only entries from verbose QueryLoggers are echoed to the terminal.
+        console_handler.addFilter(lambda record: getattr(record, "echo", False))
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(formatter)
+        log_queue = queue.Queue(maxsize=10_000)
+        listener = _WriterListener(log_queue, file_handler, console_handler)
+        listener.start()
+        # Drain whatever is still queued before the interpreter exits.
+        atexit.register(listener.stop)
+        _LISTENERS[logger.name] = listener
+        logger.addHandler(_BlockingQueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
 
 
 class QueryLogger:
     """Logs detailed query execution information."""
 
-    def __init__(self, log_file='query_execution.log'):
+    def __init__(self, log_file='query_execution.log', verbose=False):
         """Initialize the query logger.
 
         Args:
             log_file: Path to log file (default: query_execution.log)
+            verbose: Also echo entries to stdout (default: False)
         """
         self.log_file = log_file
+        self.verbose = verbose
         self.current_query_log = []
         self.start_time = None
+        self._logger = _get_logger(log_file)
+        self._closed = False
 
     def start_query(self, query):
         """Start logging a new query.
@@ -31,23 +183,21 @@ class QueryLogger:
         """
         self.current_query_log = []
         self.start_time = datetime.now()
-        self.log(f"\n{'='*80}")
-        self.log(f"QUERY: {query}")
-        self.log(f"TIMESTAMP: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        self.log(f"{'='*80}")
+        self.log("\n%s", "=" * 80)
+        self.log("QUERY: %s", query)
+        self.log("TIMESTAMP: %s", self.start_time.strftime('%Y-%m-%d %H:%M:%S'))
+        self.log("%s", "=" * 80)
 
-    def log(self, message):
+    def log(self, message, *args, level=logging.INFO):
         """Add a log entry.
 
         Args:
-            message: The message to log
+            message: The message to log, optionally a %-style format string
+            *args: Values for ``message``; formatting is left to the logging handlers
+            level: Logging level of the entry
         """
-        self.current_query_log.append(message)
-        # Write to file immediately
-        with open(self.log_file, 'a') as f:
-            f.write(message + '\n')
-        # Print to console
-        print(message)
+        self.current_query_log.append((message, args))
+        self._logger.log(level, message, *args, extra={"echo": self.verbose})
 
     def log_strategy(self, strategy, reason):
         """Log the chosen strategy.
@@ -56,8 +206,8 @@ class QueryLogger:
             strategy: Strategy name (e.g., "FAST SQL", "AI SEMANTIC SEARCH")
             reason: Reason for choosing this strategy
         """
-        self.log(f"\nSTRATEGY CHOSEN: {strategy}")
-        self.log(f"REASON: {reason}")
+        self.log("\nSTRATEGY CHOSEN: %s", strategy)
+        self.log("REASON: %s", reason)
 
     def log_sql(self, query, platform, params=None):
         """Log SQL query execution.
@@ -67,11 +217,11 @@ class QueryLogger:
             platform: Platform name (e.g., "Polymarket")
             params: Optional query parameters
         """
-        self.log(f"\n--- SQL QUERY ---")
-        self.log(f"Platform: {platform}")
-        self.log(f"Query: {query}")
+        self.log("\n--- SQL QUERY ---")
+        self.log("Platform: %s", platform)
+        self.log("Query: %s", query)
         if params:
-            self.log(f"Parameters: {params}")
+            self.log("Parameters: %s", params)
 
     def log_ai_prompt(self, step_name, prompt, response=None):
         """Log AI prompt and response.
@@ -81,15 +231,15 @@ class QueryLogger:
             prompt: The prompt sent to the AI
             response: The AI's response (optional)
         """
-        self.log(f"\n--- AI PROMPT: {step_name} ---")
-        self.log(f"Input ({len(prompt)} chars):")
-        # Truncate long prompts for readability
-        self.log(f"{prompt[:500]}..." if len(prompt) > 500 else prompt)
+        self.log("\n--- AI PROMPT: %s ---", step_name)
+        # Long prompts and responses are truncated for readability; %.500s leaves the
+        # slicing to the writer thread.
+        size = len(prompt)
+        self.log("Input (%d chars):\n%.500s%s", size, prompt, "..." if size > 500 else "")
 
         if response:
-            self.log(f"\nOutput ({len(response)} chars):")
-            # Truncate long responses for readability
-            self.log(f"{response[:500]}..." if len(response) > 500 else response)
+            size = len(response)
+            self.log("\nOutput (%d chars):\n%.500s%s", size, response, "..." if size > 500 else "")
 
     def log_results(self, count, time_elapsed):
         """Log final results.
@@ -98,9 +248,9 @@ class QueryLogger:
             count: Number of results/markets found
             time_elapsed: Time elapsed in seconds
         """
-        self.log(f"\n--- RESULTS ---")
-        self.log(f"Markets Found: {count}")
-        self.log(f"Time Elapsed: {time_elapsed:.2f}s")
+        self.log("\n--- RESULTS ---")
+        self.log("Markets Found: %s", count)
+        self.log("Time Elapsed: %.2fs", time_elapsed)
 
     def log_error(self, error_message):
         """Log an error.
@@ -108,12 +258,43 @@ class QueryLogger:
         Args:
             error_message: The error message to log
         """
-        self.log(f"\n❌ ERROR: {error_message}")
+        self.log("\n❌ ERROR: %s", error_message, level=logging.ERROR)
 
     def end_query(self):
         """End current query logging."""
-        self.log(f"{'='*80}\n")
+        self.log("%s\n", "=" * 80)
         self.start_time = None
+        self.flush()
+
+    def flush(self):
+        """Ask the writer thread to write buffered entries once it reaches this point."""
+        listener = _LISTENERS.get(self._logger.name)
+        if listener is not None:
+            listener.queue.put(_FLUSH)
+
+    def close(self):
+        """Write everything logged so far; the last open logger on a file stops its writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        name = self._logger.name
+        with _LISTENERS_LOCK:
+            users = _LISTENER_USERS.get(name, 0) - 1
+            if users > 0:
+                _LISTENER_USERS[name] = users
+                listener = None
+            else:
+                _LISTENER_USERS.pop(name, None)
+                listener = _LISTENERS.pop(name, None)
+                for handler in list(self._logger.handlers):
+                    self._logger.removeHandler(handler)
+        if listener is None:
+            # Other QueryLoggers still write to this file through the same thread.
+            self.flush()
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
     def get_log_contents(self):
         """Get the current query log contents.
@@ -121,12 +302,20 @@ class QueryLogger:
         Returns:
             List of log messages for the current query
         """
-        return self.current_query_log.copy()
+        return [message % args if args else message for message, args in self.current_query_log]
 
     def clear_log_file(self):
         """Clear the entire log file."""
-        with open(self.log_file, 'w') as f:
-            f.write("")
+        listener = _LISTENERS.get(self._logger.name)
+        if listener is not None:
+            # Entries still queued for the writer thread would land after a direct
+            # truncate, so the writer empties the file once it reaches this request.
+            request = _TruncateRequest()
+            listener.queue.put(request)
+            request.done.wait()
+        else:
+            with open(self.log_file, 'w') as f:
+                f.write("")
         print(f"Log file {self.log_file} cleared")
 
 
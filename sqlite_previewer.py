@@ -3,10 +3,63 @@
 
 import argparse
 import sqlite3
+import threading
 import time
 from pathlib import Path
-
-from flask import Flask, jsonify, render_template, request
+from urllib.parse import quote
+
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # pragma: no cover - optional dependency
+    Compress = None
+
+# Rows pulled from the cursor and serialized per chunk of a streamed /api/query response.
+STREAM_BATCH_ROWS = 1000
+
+# Per-thread read-only connections, keyed by database path, reused across requests so
+# the page cache and mmap stay warm.
+_tls = threading.local()
+
+# Authorizer actions a user query may compile to; anything else (writes, ATTACH,
+# setting PRAGMAs, ...) is refused by SQLite while the statement is being prepared.
+_READ_ONLY_ACTIONS = frozenset({
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+})
+
+# Building a virtual table (FTS5, json_each, pragma_table_info, ...) on a fresh
+# connection makes SQLite authorize an internal UPDATE of the schema table and a few
+# introspection PRAGMAs; the database itself is still opened mode=ro with query_only.
+_SCHEMA_TABLES = frozenset({'sqlite_master', 'sqlite_schema'})
+_READ_ONLY_PRAGMAS = frozenset({
+    'data_version',
+    'foreign_key_list',
+    'index_info',
+    'index_list',
+    'index_xinfo',
+    'table_info',
+    'table_xinfo',
+})
+
+
+def _read_only_authorizer(action, arg1, *_):
+    if action in _READ_ONLY_ACTIONS:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_UPDATE and arg1 in _SCHEMA_TABLES:
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and arg1 in _READ_ONLY_PRAGMAS:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_DENY
 
 
 def resolve_db_path(raw_path: str) -> Path:
@@ -27,16 +80,49 @@ def resolve_db_path(raw_path: str) -> Path:
 
 def quote_identifier(identifier: str) -> str:
     """Return a double-quoted SQLite identifier."""
-    return f'"{identifier.replace("\"", "\"\"")}"'
+    escaped = identifier.replace('"', '""')
+    return f'"{escaped}"'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson, keeping Flask's sorted-key output."""
+
+    _options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        # orjson output is already compact; indented output (debug-mode jsonify) and
+        # other stdlib-only options fall back to the default provider.
+        if kwargs.get('separators') == (',', ':'):
+            del kwargs['separators']
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
 
 
 def create_app(database_path: Path) -> Flask:
     app = Flask(__name__)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    # Compact separators even under the debug server, which would otherwise indent.
+    app.json.compact = True
+    if Compress is not None:
+        # Gzip responses (including the streamed query results) for clients that accept it.
+        Compress(app)
     app.config['DATABASE_PATH'] = database_path
 
     def connect() -> sqlite3.Connection:
-        uri = f'file:{database_path.as_posix()}?mode=ro'
-        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conns = getattr(_tls, 'conns', None)
+        if conns is None:
+            conns = _tls.conns = {}
+        conn = conns.get(database_path)
+        if conn is None:
+            uri = f'file:{quote(database_path.as_posix())}?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA query_only=ON')
+            conn.execute('PRAGMA mmap_size=268435456')
+            conn.execute('PRAGMA cache_size=-65536')
+            conns[database_path] = conn
+        return conn
 
     @app.route('/')
     def index():
@@ -49,30 +135,47 @@ def create_app(database_path: Path) -> Flask:
             cursor = conn.cursor()
 
             cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+                """
+                SELECT m.name, p.name, p.type, p.pk, m.sql LIKE '%WITHOUT ROWID%'
+                FROM sqlite_master m
+                JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, p.cid
+                """
             )
-            tables = [row[0] for row in cursor.fetchall()]
-
             schema_payload = {}
-            for table in tables:
-                cursor.execute(f"PRAGMA table_info({quote_identifier(table)})")
-                columns = cursor.fetchall()
-                cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}")
-                row_count = cursor.fetchone()[0]
-
-                schema_payload[table] = {
-                    'count': row_count,
-                    'columns': [
-                        {
-                            'name': col[1],
-                            'type': col[2],
-                            'pk': bool(col[5])
-                        }
-                        for col in columns
-                    ]
-                }
-
-            conn.close()
+            without_rowid = set()
+            for table, name, col_type, pk, no_rowid in cursor.fetchall():
+                entry = schema_payload.get(table)
+                if entry is None:
+                    entry = schema_payload[table] = {'approx_count': None, 'columns': []}
+                    if no_rowid:
+                        without_rowid.add(table)
+                entry['columns'].append({'name': name, 'type': col_type, 'pk': bool(pk)})
+
+            # Row counts are estimates: ANALYZE statistics where the database has them
+            # (the leading integer of sqlite_stat1.stat is the table's row count),
+            # otherwise the largest rowid, which is an index seek rather than a scan.
+            try:
+                cursor.execute('SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl')
+                for table, row_count in cursor.fetchall():
+                    if table in schema_payload:
+                        schema_payload[table]['approx_count'] = row_count
+            except sqlite3.OperationalError:
+                pass  # No sqlite_stat1 until ANALYZE has been run on the database.
+
+            missing = [table for table, entry in schema_payload.items() if entry['approx_count'] is None]
+            if missing:
+                cursor.execute(
+                    ' UNION ALL '.join(
+                        f"SELECT ?, {'COUNT(*)' if table in without_rowid else 'MAX(_rowid_)'} "
+                        f"FROM {quote_identifier(table)}"
+                        for table in missing
+                    ),
+                    missing,
+                )
+                for table, row_count in cursor.fetchall():
+                    schema_payload[table]['approx_count'] = row_count or 0
 
             return jsonify({'success': True, 'schema': schema_payload})
         except Exception as exc:
@@ -87,9 +190,6 @@ def create_app(database_path: Path) -> Flask:
         if not query:
             return jsonify({'success': False, 'error': 'Query is required'}), 400
 
-        if not query.lower().startswith('select'):
-            return jsonify({'success': False, 'error': 'Only SELECT statements are permitted'}), 400
-
         base_query = query.rstrip(';\n\r\t ')
 
         limit_clause = None
@@ -108,31 +208,56 @@ def create_app(database_path: Path) -> Flask:
 
         try:
             conn = connect()
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
             start = time.perf_counter()
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            # The authorizer is only consulted while the statement is prepared, so it
+            # can be dropped again before the rows are stepped.
+            conn.set_authorizer(_read_only_authorizer)
+            try:
+                cursor.execute(query)
+            finally:
+                conn.set_authorizer(None)
             elapsed = time.perf_counter() - start
 
-            columns = rows[0].keys() if rows else [desc[0] for desc in cursor.description or []]
-            data = [dict(row) for row in rows]
-
-            conn.close()
-
-            return jsonify(
-                {
-                    'success': True,
-                    'columns': columns,
-                    'data': data,
-                    'count': len(data),
-                    'execution_time': elapsed,
-                }
-            )
+            columns = [desc[0] for desc in cursor.description or []]
+        except sqlite3.DatabaseError as exc:
+            if str(exc) == 'not authorized':
+                return jsonify({'success': False, 'error': 'Only read-only SELECT statements are permitted'}), 400
+            return jsonify({'success': False, 'error': str(exc)}), 500
         except Exception as exc:
             return jsonify({'success': False, 'error': str(exc)}), 500
 
+        def generate():
+            # Serialize the result set batch by batch as the cursor produces it, so neither
+            # the full row list nor the full JSON document is ever held in memory. The
+            # summary fields (including success) close the object once the rows are done.
+            def dumps(obj):
+                return app.json.dumps(obj, separators=(',', ':'))
+
+            query_time = elapsed
+            count = 0
+            try:
+                yield '{"columns":' + dumps(columns) + ',"data":['
+                try:
+                    while True:
+                        batch_start = time.perf_counter()
+                        batch = cursor.fetchmany(STREAM_BATCH_ROWS)
+                        query_time += time.perf_counter() - batch_start
+                        if not batch:
+                            break
+                        chunk = ','.join(dumps(dict(zip(columns, row))) for row in batch)
+                        yield (',' if count else '') + chunk
+                        count += len(batch)
+                    summary = {'count': count, 'execution_time': query_time, 'success': True}
+                except Exception as exc:
+                    summary = {'count': count, 'success': False, 'error': str(exc)}
+                yield '],' + dumps(summary)[1:]
+            finally:
+                cursor.close()
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
     return app
 
 
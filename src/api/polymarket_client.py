@@ -2,20 +2,84 @@
 Polymarket API Client
 """
 
+import os
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from typing import Dict, List, Optional
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 from datetime import datetime
 
+# Seconds API-derived results are reused; market listings barely move minute to minute.
+CACHE_TTL_SECONDS = float(os.getenv("POLYMARKET_CACHE_TTL", "60"))
+
+
+class _TTLCache:
+    """Small in-memory cache with a time-to-live and FIFO eviction."""
+
+    def __init__(self, ttl: float, max_entries: int = 512):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: Dict[Hashable, tuple] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self._ttl:
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self._ttl <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        while len(self._entries) > self._max_entries:
+            del self._entries[next(iter(self._entries))]
+
+
 class PolymarketClient:
     """Client for interacting with Polymarket APIs."""
 
     def __init__(self):
         self.gamma_api_base = "https://gamma-api.polymarket.com"
         self.clob_api_base = "https://clob.polymarket.com"
+        self._markets_cache = _TTLCache(CACHE_TTL_SECONDS)
+        self._search_cache = _TTLCache(CACHE_TTL_SECONDS)
+        # One pooled keep-alive session: repeat calls skip the TCP and TLS handshakes.
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.2,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                ),
+            ),
+        )
 
     def get_markets(self, limit: int = 20, offset: int = 0) -> List[Dict]:
         """Get list of markets from Polymarket."""
+        markets, _ = self._fetch_markets(limit, offset)
+        return list(markets)
+
+    def _fetch_markets(self, limit: int, offset: int) -> Tuple[List[Dict], List[str]]:
+        """Return a markets page together with each market's lowercased question.
+
+        The lowercased questions are computed once per fetched page and cached with it,
+        so repeated searches over the same page only do the substring tests.
+        """
+        cached = self._markets_cache.get((limit, offset))
+        if cached is not None:
+            return cached
+
         try:
             url = f"{self.gamma_api_base}/markets"
             params = {
@@ -23,26 +87,36 @@ class PolymarketClient:
                 "offset": offset,
                 "closed": "false"
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            return response.json()
+            markets = response.json()
+            entry = (markets, [(market.get("question") or "").lower() for market in markets])
+            self._markets_cache.set((limit, offset), entry)
+            return entry
         except Exception as e:
             print(f"Error fetching markets: {e}")
-            return []
+            return [], []
 
     def search_markets(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for markets by query."""
+        q_lower = query.strip().lower()
+        cached = self._search_cache.get((q_lower, limit))
+        if cached is not None:
+            return list(cached)
+
         try:
-            markets = self.get_markets(limit=100)
+            markets, questions = self._fetch_markets(100, 0)
             filtered_markets = []
 
-            for market in markets:
-                if query.lower() in market.get("question", "").lower():
+            for market, question in zip(markets, questions):
+                if q_lower in question:
                     filtered_markets.append(market)
                     if len(filtered_markets) >= limit:
                         break
 
-            return filtered_markets
+            if markets:  # Don't remember the empty result of a failed fetch.
+                self._search_cache.set((q_lower, limit), filtered_markets)
+            return list(filtered_markets)
         except Exception as e:
             print(f"Error searching markets: {e}")
             return []
@@ -52,7 +126,7 @@ class PolymarketClient:
         try:
             url = f"{self.clob_api_base}/prices"
             params = {"market": token_id}
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -68,7 +142,7 @@ class PolymarketClient:
                 "interval": "max",
                 "fidelity": fidelity
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             return data.get("history", [])
@@ -81,7 +155,7 @@ class PolymarketClient:
         try:
             url = f"{self.gamma_api_base}/markets"
             params = {"slug": slug}
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             return data[0] if data else None
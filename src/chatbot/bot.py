@@ -3,15 +3,37 @@ Polymarket Chatbot Implementation
 """
 
 import re
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from src.api.polymarket_client import PolymarketClient
 
 class PolymarketChatbot:
     """Chatbot for interacting with Polymarket data."""
 
+    # Intent trigger words in one alternation; a group name is the intent it signals.
+    # Like the old substring checks, triggers match anywhere in the message.
+    _INTENT_RE = re.compile(
+        r'(?P<price>price|cost|value)'
+        r'|(?P<search>search|find|look for)'
+        r'|(?P<market>markets?)'
+        r'|(?P<help>help|commands|what can you do)'
+    )
+    _INTENT_PRIORITY = ("price", "search", "market", "help")
+    _SEARCH_RE = re.compile(r'\b(search|find|look for)\b')
+    _STOP_WORDS = frozenset({"what", "is", "the", "price", "of", "for", "show", "me", "get", "about"})
+    # Most recent (role, message) pairs kept per chatbot; older turns are dropped.
+    HISTORY_LIMIT = 200
+
     def __init__(self, polymarket_client: PolymarketClient):
         self.client = polymarket_client
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=self.HISTORY_LIMIT)
+        self._intent_handlers = {
+            "price": self._handle_price_query,
+            "search": self._handle_search_query,
+            "market": self._handle_market_query,
+            "help": lambda message: self._handle_help_query(),
+        }
 
     def process_message(self, message: str) -> str:
         """Process user message and return bot response."""
@@ -19,17 +41,11 @@ class PolymarketChatbot:
         self.conversation_history.append(("user", message))
 
         try:
-            # Detect intent and respond accordingly
-            if any(word in message for word in ["price", "cost", "value"]):
-                response = self._handle_price_query(message)
-            elif any(word in message for word in ["search", "find", "look for"]):
-                response = self._handle_search_query(message)
-            elif any(word in message for word in ["market", "markets"]):
-                response = self._handle_market_query(message)
-            elif any(word in message for word in ["help", "commands", "what can you do"]):
-                response = self._handle_help_query()
-            else:
-                response = self._handle_general_query(message)
+            # Detect intent in one scan; when several intents appear, the highest priority wins.
+            found = {match.lastgroup for match in self._INTENT_RE.finditer(message)}
+            intent = next((name for name in self._INTENT_PRIORITY if name in found), None)
+            handler = self._intent_handlers.get(intent, self._handle_general_query)
+            response = handler(message)
 
             self.conversation_history.append(("bot", response))
             return response
@@ -39,6 +55,10 @@ class PolymarketChatbot:
             self.conversation_history.append(("bot", error_response))
             return error_response
 
+    def history(self) -> List[Tuple[str, str]]:
+        """Return the retained conversation as a list of (role, message) pairs."""
+        return list(self.conversation_history)
+
     def _handle_price_query(self, message: str) -> str:
         """Handle price-related queries."""
         # Extract market name from message
@@ -55,31 +75,38 @@ class PolymarketChatbot:
 
         # Get price for the first matching market
         market = markets[0]
-        response = f"📈 **{market.get('question', 'Unknown Market')}**\\n"
+        parts = [f"📈 **{market.get('question', 'Unknown Market')}**\n"]
 
         # Get token prices
         tokens = market.get('tokens', [])
         if tokens:
+            # One /prices call per outcome; fetch them concurrently instead of back to back.
+            token_ids = [token.get('token_id') for token in tokens if token.get('token_id')]
+            price_map = {}
+            if token_ids:
+                with ThreadPoolExecutor(max_workers=min(len(token_ids), 8)) as executor:
+                    price_map = dict(zip(token_ids, executor.map(self.client.get_market_prices, token_ids)))
+
             for token in tokens:
                 token_id = token.get('token_id')
                 outcome = token.get('outcome', 'Unknown')
 
                 if token_id:
-                    price_data = self.client.get_market_prices(token_id)
+                    price_data = price_map.get(token_id)
                     if price_data and 'price' in price_data:
                         price = float(price_data['price']) * 100
-                        response += f"  • {outcome}: {price:.1f}¢\\n"
+                        parts.append(f"  • {outcome}: {price:.1f}¢\n")
                     else:
-                        response += f"  • {outcome}: Price unavailable\\n"
+                        parts.append(f"  • {outcome}: Price unavailable\n")
         else:
-            response += "Price data unavailable for this market."
+            parts.append("Price data unavailable for this market.")
 
-        return response
+        return "".join(parts)
 
     def _handle_search_query(self, message: str) -> str:
         """Handle search queries."""
         # Remove search keywords and extract the actual query
-        search_terms = re.sub(r'\\b(search|find|look for)\\b', '', message).strip()
+        search_terms = self._SEARCH_RE.sub('', message).strip()
 
         if not search_terms:
             return "What would you like me to search for?"
@@ -89,25 +116,25 @@ class PolymarketChatbot:
         if not markets:
             return f"No markets found for '{search_terms}'. Try different keywords."
 
-        response = f"🔍 Found {len(markets)} market(s) for '{search_terms}': \\n\\n"
+        parts = [f"🔍 Found {len(markets)} market(s) for '{search_terms}': \n\n"]
 
         for i, market in enumerate(markets, 1):
             question = market.get('question', 'Unknown Market')
             end_date = market.get('end_date_iso', 'Unknown')
-            response += f"{i}. {question}\\n   Ends: {end_date}\\n\\n"
+            parts.append(f"{i}. {question}\n   Ends: {end_date}\n\n")
 
-        return response
+        return "".join(parts)
 
     def _handle_market_query(self, message: str) -> str:
         """Handle general market queries."""
         if "trending" in message or "popular" in message:
             markets = self.client.get_markets(limit=5)
             if markets:
-                response = "🔥 **Trending Markets:**\\n\\n"
+                parts = ["🔥 **Trending Markets:**\n\n"]
                 for i, market in enumerate(markets, 1):
                     question = market.get('question', 'Unknown Market')
-                    response += f"{i}. {question}\\n"
-                return response
+                    parts.append(f"{i}. {question}\n")
+                return "".join(parts)
             else:
                 return "Unable to fetch trending markets at the moment."
         else:
@@ -145,7 +172,6 @@ Type your question naturally - I'll do my best to help!"""
     def _extract_market_keywords(self, message: str) -> List[str]:
         """Extract potential market keywords from message."""
         # Remove common words and price-related terms
-        stop_words = {"what", "is", "the", "price", "of", "for", "show", "me", "get", "about"}
         words = message.split()
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        keywords = [word for word in words if word not in self._STOP_WORDS and len(word) > 2]
         return keywords
\ No newline at end of file
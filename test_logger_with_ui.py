@@ -4,7 +4,7 @@ Test the logger to see queries appear in the UI.
 from query_logger import QueryLogger
 import time
 
-logger = QueryLogger()
+logger = QueryLogger(verbose=True)
 
 # Test Query 1: SQL Query
 print("Testing SQL query logging...")
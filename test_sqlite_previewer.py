@@ -0,0 +1,54 @@
+"""
+Checks that the SQLite previewer's read-only query gate still runs virtual-table reads.
+"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip('flask')
+
+from sqlite_previewer import create_app
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = tmp_path / 'preview.db'
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('CREATE VIRTUAL TABLE f USING fts5(body)')
+        conn.execute("INSERT INTO f VALUES ('x marks the spot')")
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.commit()
+    except sqlite3.OperationalError:
+        pytest.skip('SQLite built without FTS5')
+    finally:
+        conn.close()
+    return create_app(db_path).test_client()
+
+
+def run(client, query):
+    response = client.post('/api/query', json={'query': query})
+    return response.status_code, response.get_json()
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT * FROM f WHERE f MATCH 'x'",
+    "SELECT value FROM json_each('[1, 2, 3]')",
+    "SELECT name FROM pragma_table_info('t')",
+])
+def test_virtual_table_reads_are_allowed(client, query):
+    status, body = run(client, query)
+    assert status == 200, body
+    assert body['success'] and body['data']
+
+
+@pytest.mark.parametrize('query', [
+    "DELETE FROM t",
+    "PRAGMA query_only=OFF",
+    "ATTACH DATABASE ':memory:' AS other",
+    "WITH x AS (SELECT 1) INSERT INTO t (name) SELECT * FROM x",
+])
+def test_writes_are_refused(client, query):
+    status, body = run(client, query)
+    assert status == 400, body
+    assert not body['success']
@@ -2,73 +2,214 @@
 Fast market data updater - updates all enrichment fields for all active events every 5 seconds
 Uses parallel processing for efficiency
 """
+import atexit
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import schedule
 from datetime import datetime
 from database import Database
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+log = logging.getLogger(__name__)
 
 GAMMA = "https://gamma-api.polymarket.com"
 
+UPDATE_INTERVAL_SECONDS = 20
+
 BOOTSTRAP_LIMIT = 500
+# Event pages requested concurrently while bootstrapping.
+BOOTSTRAP_PAGE_WORKERS = 8
+
+# Shared keep-alive session for every Gamma call; the pool is sized above the 50 fetch
+# workers so none of them has to open (and TLS-handshake) a connection of its own.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=64,
+        pool_maxsize=64,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
+# requests already advertises gzip/deflate (and br when brotli is installed) and decodes
+# the body transparently; only the JSON media type is added.
+SESSION.headers["Accept"] = "application/json"
+
+# Fingerprint of each active event's row as last written by the bootstrap, keyed by id.
+# Rebuilt every cycle, so events that drop out of the listing are forgotten with it.
+_FINGERPRINTS = {}
+
+# Rows the writer thread commits per transaction; small enough to keep each write lock short.
+WRITE_BATCH_SIZE = 500
+# Upper bound on concurrent per-event requests.
+FETCH_WORKERS = 50
+
+
+# Numeric fields read from each listed event and its first market. itemgetter builds the
+# tuple in one C call; get_fields falls back to .get() when a payload omits a key.
+EVENT_NUMBER_FIELDS = ("volume", "liquidity", "liquidityClob", "openInterest")
+MARKET_NUMBER_FIELDS = ("lastTradePrice", "bestBid", "bestAsk", "liquidityNum")
+_EVENT_NUMBERS = itemgetter(*EVENT_NUMBER_FIELDS)
+_MARKET_NUMBERS = itemgetter(*MARKET_NUMBER_FIELDS)
+
+
+def get_fields(record, getter, names):
+    """Return getter(record), or the same fields via .get() if any key is missing."""
+    try:
+        return getter(record)
+    except KeyError:
+        return tuple(record.get(name) for name in names)
 
 
-def bootstrap_active_events(db):
-    """Ensure the database contains up-to-date active events from Polymarket."""
-    all_events = []
-    offset = 0
+def to_float(value):
+    """Convert an API number or numeric string to float, or None."""
+    # Most fields are missing or already JSON numbers; only strings need parsing.
+    if value is None or type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
 
-    while True:
-        try:
-            response = requests.get(
-                f"{GAMMA}/events",
-                params={
-                    "active": "true",
-                    "closed": "false",
-                    "limit": BOOTSTRAP_LIMIT,
-                    "offset": offset
-                },
-                timeout=15
-            )
-            if not response.ok:
-                print(f"  Error bootstrapping events (offset {offset}): {response.status_code}")
-                break
 
-            batch = response.json()
-        except Exception as e:
-            print(f"  Error fetching active events (offset {offset}): {e}")
-            break
+def to_int(value):
+    """Convert an API integer or numeric string to int, or None."""
+    if value is None or type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
-        if not batch:
-            break
 
-        all_events.extend(batch)
+def to_optional_float(value):
+    """Like to_float, but missing, zero and empty values all become None."""
+    return to_float(value) if value else None
 
-        if len(batch) < BOOTSTRAP_LIMIT:
-            break
 
-        offset += len(batch)
+def event_market_fields(event_data):
+    """Return the market-data columns for one event payload, from the listing or /events/{id}.
 
-    if not all_events:
-        return []
+    Both sources go through here so a listed event is stored exactly as a per-event
+    refresh would store it.
+    """
+    volume, liquidity, liquidity_clob, open_interest = get_fields(
+        event_data, _EVENT_NUMBERS, EVENT_NUMBER_FIELDS
+    )
 
-    active_ids = []
-    seen_ids = set()
+    # Market-level fields come from the first market.
+    markets = event_data.get("markets") or []
+    outcome_prices = "[]"
+    last_trade_price = None
+    best_bid = None
+    best_ask = None
+    liquidity_num = None
 
-    def to_float(value):
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return None
+    if markets:
+        market = markets[0]
+        outcome_prices = str(market.get("outcomePrices", "[]"))
+        last_trade_price, best_bid, best_ask, liquidity_num = map(
+            to_optional_float, get_fields(market, _MARKET_NUMBERS, MARKET_NUMBER_FIELDS)
+        )
 
-    def to_int(value):
-        try:
-            return int(value)
-        except (TypeError, ValueError):
+    return {
+        'volume': int(to_float(volume) or 0),
+        'last_trade_date': event_data.get("endDateIso") or event_data.get("endDate"),
+        'description': event_data.get("description", ""),
+        'outcome_prices': outcome_prices,
+        'last_trade_price': last_trade_price,
+        'best_bid': best_bid,
+        'best_ask': best_ask,
+        'liquidity': to_optional_float(liquidity),
+        'liquidity_num': liquidity_num,
+        'liquidity_clob': to_optional_float(liquidity_clob),
+        'open_interest': to_optional_float(open_interest)
+    }
+
+
+def decode_json(response):
+    """Decode a JSON response body, with orjson when it is installed."""
+    return orjson.loads(response.content) if orjson is not None else response.json()
+
+
+def fetch_active_events_page(offset):
+    """Fetch one page of active events, or None if the request failed."""
+    try:
+        response = SESSION.get(
+            f"{GAMMA}/events",
+            params={
+                "active": "true",
+                "closed": "false",
+                "limit": BOOTSTRAP_LIMIT,
+                "offset": offset
+            },
+            timeout=15
+        )
+        if not response.ok:
+            log.warning("  Error bootstrapping events (offset %s): %s", offset, response.status_code)
             return None
 
-    for event in all_events:
+        return decode_json(response)
+    except Exception as e:
+        log.warning("  Error fetching active events (offset %s): %s", offset, e)
+        return None
+
+
+def iter_active_events():
+    """Yield every active event, requesting BOOTSTRAP_PAGE_WORKERS pages at a time.
+
+    The total isn't known up front, so pages are fetched in waves of consecutive
+    offsets; the first empty, short or failed page ends the listing. Events are
+    yielded page by page, so the caller never holds the whole listing.
+    """
+    offset = 0
+
+    with ThreadPoolExecutor(max_workers=BOOTSTRAP_PAGE_WORKERS) as executor:
+        while True:
+            offsets = [offset + i * BOOTSTRAP_LIMIT for i in range(BOOTSTRAP_PAGE_WORKERS)]
+            for batch in executor.map(fetch_active_events_page, offsets):
+                if not batch:
+                    return
+
+                yield from batch
+
+                if len(batch) < BOOTSTRAP_LIMIT:
+                    return
+
+            offset += BOOTSTRAP_PAGE_WORKERS * BOOTSTRAP_LIMIT
+
+
+def bootstrap_active_events(db):
+    """Ensure the database contains up-to-date active events from Polymarket.
+
+    Returns the listed event ids and how many of their rows were actually written.
+    """
+    # Compare against the last committed cycle; until this one commits, no row counts
+    # as stored (and if the listing fails, the per-event fallback writes rows differently).
+    previous_fingerprints = _FINGERPRINTS.copy()
+    _FINGERPRINTS.clear()
+
+    active_ids = []
+    fingerprints = {}
+    seen_ids = set()
+    rows = []
+    changed_count = 0
+
+    # Changed rows are written in batches as pages arrive, all in one transaction that
+    # the inactive-flag update commits at the end.
+    for event in iter_active_events():
         event_id = str(event.get("id"))
         if not event_id:
             continue
@@ -78,7 +219,6 @@ def bootstrap_active_events(db):
 
         slug = event.get("slug") or event.get("ticker") or event_id
         title = event.get("title") or event.get("question") or slug
-        description = event.get("description")
         domain = event.get("category")
 
         series = event.get("series") or []
@@ -88,196 +228,179 @@ def bootstrap_active_events(db):
         subsection = tags[0].get("label") if tags else None
         subsection_tag_id = to_int(tags[0].get("id")) if tags else None
 
-        volume = to_float(event.get("volume"))
-        liquidity = to_float(event.get("liquidity"))
-        liquidity_clob = to_float(event.get("liquidityClob"))
-        open_interest = to_float(event.get("openInterest"))
-        last_trade_date = event.get("endDate") or event.get("endDateIso")
-
-        markets = event.get("markets") or []
-        outcome_prices = None
-        last_trade_price = None
-        best_bid = None
-        best_ask = None
-        liquidity_num = None
-
-        if markets:
-            market = markets[0]
-            outcome_prices = str(market.get("outcomePrices", "[]"))
-            last_trade_price = to_float(market.get("lastTradePrice"))
-            best_bid = to_float(market.get("bestBid"))
-            best_ask = to_float(market.get("bestAsk"))
-            liquidity_num = to_float(market.get("liquidityNum"))
-
-        db.add_or_update_event(
-            event_id=event_id,
-            slug=slug,
-            title=title,
-            domain=domain,
-            section=section,
-            subsection=subsection,
-            section_tag_id=None,
-            subsection_tag_id=subsection_tag_id,
-            volume=volume,
-            last_trade_date=last_trade_date,
-            outcome_prices=outcome_prices,
-            last_trade_price=last_trade_price,
-            best_bid=best_bid,
-            best_ask=best_ask,
-            liquidity=liquidity,
-            liquidity_num=liquidity_num,
-            liquidity_clob=liquidity_clob,
-            open_interest=open_interest,
-            description=description
-        )
-
+        row = {
+            'id': event_id,
+            'slug': slug,
+            'title': title,
+            'domain': domain,
+            'section': section,
+            'subsection': subsection,
+            'section_tag_id': None,
+            'subsection_tag_id': subsection_tag_id,
+            **event_market_fields(event)
+        }
+        # Unchanged events are left alone instead of rewriting identical rows every cycle.
+        fingerprint = hash(tuple(row.values()))
+        fingerprints[event_id] = fingerprint
+        if previous_fingerprints.get(event_id) != fingerprint:
+            rows.append(row)
+            if len(rows) >= WRITE_BATCH_SIZE:
+                changed_count += db.upsert_events(rows, commit=False)
+                rows = []
         active_ids.append(event_id)
 
     if active_ids:
+        changed_count += db.upsert_events(rows, commit=False)
         db.mark_inactive_events(active_ids)
-        print(f"  Refreshed metadata for {len(active_ids)} active events")
+        _FINGERPRINTS.update(fingerprints)
+        log.info("  Refreshed metadata for %d active events (%d changed)", len(active_ids), changed_count)
 
-    return active_ids
+    return active_ids, changed_count
 
 
 def fetch_event_market_data(event_id):
     """Fetch complete market data for a single event."""
     try:
-        response = requests.get(f"{GAMMA}/events/{event_id}", timeout=10)
+        response = SESSION.get(f"{GAMMA}/events/{event_id}", timeout=10)
         if not response.ok:
             return None
 
-        data = response.json()
+        data = decode_json(response)
         event_data = data[0] if isinstance(data, list) and data else data
+        return event_market_fields(event_data)
 
-        # Extract event-level fields
-        volume = int(float(event_data.get("volume", 0)))
-        last_trade_date = event_data.get("endDateIso") or event_data.get("endDate")
-        description = event_data.get("description", "")  # Extract description
-        liquidity = float(event_data.get("liquidity", 0)) if event_data.get("liquidity") else None
-        liquidity_clob = float(event_data.get("liquidityClob", 0)) if event_data.get("liquidityClob") else None
-        open_interest = float(event_data.get("openInterest", 0)) if event_data.get("openInterest") else None
-
-        # Extract market-level fields from first active market
-        markets = event_data.get("markets", [])
-        outcome_prices = "[]"
-        last_trade_price = None
-        best_bid = None
-        best_ask = None
-        liquidity_num = None
-
-        if markets:
-            # Use first market for pricing data
-            market = markets[0]
-            outcome_prices = str(market.get("outcomePrices", "[]"))
-            last_trade_price = float(market.get("lastTradePrice", 0)) if market.get("lastTradePrice") else None
-            best_bid = float(market.get("bestBid", 0)) if market.get("bestBid") else None
-            best_ask = float(market.get("bestAsk", 0)) if market.get("bestAsk") else None
-            liquidity_num = float(market.get("liquidityNum", 0)) if market.get("liquidityNum") else None
-
-        return {
-            'volume': volume,
-            'last_trade_date': last_trade_date,
-            'description': description,
-            'outcome_prices': outcome_prices,
-            'last_trade_price': last_trade_price,
-            'best_bid': best_bid,
-            'best_ask': best_ask,
-            'liquidity': liquidity,
-            'liquidity_num': liquidity_num,
-            'liquidity_clob': liquidity_clob,
-            'open_interest': open_interest
-        }
+    except Exception as e:
+        log.warning("  Error fetching market data for %s: %s", event_id, e)
+        return None
 
+def fetch_event_row(event):
+    """Fetch fresh market data for one event and return its upsert row, or None."""
+    try:
+        market_data = fetch_event_market_data(event['id'])
+        if market_data is None:
+            return None
+        return {**event, 'section_tag_id': None, 'subsection_tag_id': None, **market_data}
     except Exception as e:
-        print(f"  Error fetching market data for {slug}: {e}")
+        log.warning("  Error updating event %s: %s", event['slug'], e)
         return None
 
-def fetch_and_update_event(event):
-    """Fetch and update a single event (for parallel execution). Each thread gets its own DB connection."""
-    db = Database()  # Create new DB session for this thread
+def write_event_rows(db, row_queue, total, result):
+    """Drain fetched rows from row_queue and upsert them in batches until a None arrives."""
+    batch = []
+    written = 0
     try:
-        market_data = fetch_event_market_data(event.id)
-
-        if market_data is not None:
-            db.add_or_update_event(
-                event_id=event.id,
-                slug=event.slug,
-                title=event.title,
-                domain=event.domain,
-                section=event.section,
-                subsection=event.subsection,
-                volume=market_data['volume'],
-                last_trade_date=market_data['last_trade_date'],
-                description=market_data['description'],
-                outcome_prices=market_data['outcome_prices'],
-                last_trade_price=market_data['last_trade_price'],
-                best_bid=market_data['best_bid'],
-                best_ask=market_data['best_ask'],
-                liquidity=market_data['liquidity'],
-                liquidity_num=market_data['liquidity_num'],
-                liquidity_clob=market_data['liquidity_clob'],
-                open_interest=market_data['open_interest']
-            )
-            return True
-        return False
+        while True:
+            row = row_queue.get()
+            if row is not None:
+                batch.append(row)
+            if batch and (row is None or len(batch) >= WRITE_BATCH_SIZE):
+                written += db.upsert_events(batch)
+                batch = []
+                log.info("  Updated %d/%d events...", written, total)
+            if row is None:
+                break
     except Exception as e:
-        print(f"  Error updating event {event.slug}: {e}")
-        return False
+        result['error'] = e
+    result['written'] = written
+
+def refresh_events(db, events):
+    """Fetch each event's market data with its own request and upsert it; returns rows written."""
+    # Workers only do HTTP; a single writer thread owns the connection and commits
+    # their rows in batches while the remaining fetches are still in flight.
+    snapshots = [
+        {
+            'id': event.id,
+            'slug': event.slug,
+            'title': event.title,
+            'domain': event.domain,
+            'section': event.section,
+            'subsection': event.subsection
+        }
+        for event in events
+    ]
+    row_queue = queue.Queue()
+    result = {}
+    writer = threading.Thread(
+        target=write_event_rows, args=(db, row_queue, len(events), result), daemon=True
+    )
+    writer.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(snapshots))) as executor:
+            futures = [executor.submit(fetch_event_row, snapshot) for snapshot in snapshots]
+
+            for future in as_completed(futures):
+                row = future.result()
+                if row is not None:
+                    row_queue.put(row)
     finally:
-        db.close()
+        row_queue.put(None)
+        writer.join()
+
+    if 'error' in result:
+        raise result['error']
+    return result['written']
+
 
 def update_all_market_data():
     """Update all enrichment fields for all active events in parallel."""
-    print(f"[{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}] Starting market data update...")
+    log.info("[%s] Starting market data update...", datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
 
     db = Database()
 
     try:
         # Ensure we have the latest set of active events
-        active_ids = bootstrap_active_events(db)
+        active_ids, changed_count = bootstrap_active_events(db)
         if not active_ids:
-            print("  Warning: No active events fetched from Polymarket.")
+            log.warning("  Warning: No active events fetched from Polymarket.")
 
         # Get all active events
         active_events = db.get_all_active_events()
-        print(f"  Found {len(active_events)} active events")
-
-        updated_count = 0
-        
-        # Use ThreadPoolExecutor for parallel requests (50 workers for faster processing)
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            # Submit all tasks (each will create its own DB connection)
-            futures = {executor.submit(fetch_and_update_event, event): event for event in active_events}
-            
-            # Process completed tasks
-            for future in as_completed(futures):
-                if future.result():
-                    updated_count += 1
-                    
-                    if updated_count % 100 == 0:
-                        print(f"  Updated {updated_count}/{len(active_events)} events...")
-
-        print(f"  Successfully updated market data for {updated_count} events")
-        print(f"[{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}] Market data update completed\n")
+        log.info("  Found %d active events", len(active_events))
+
+        # The bootstrap listing already carries each event's market data and has been
+        # written; only events it did not return (all of them if it failed) still need
+        # a per-event request.
+        refreshed_ids = set(active_ids)
+        pending_events = [event for event in active_events if event.id not in refreshed_ids]
+        if pending_events:
+            log.info("  Fetching market data for %d events missing from the listing", len(pending_events))
+
+        written = refresh_events(db, pending_events) if pending_events else 0
+        updated_count = changed_count + written
+        log.info(
+            "  Successfully updated market data for %d events (%d unchanged)",
+            updated_count, len(refreshed_ids) - changed_count,
+        )
+        log.info("[%s] Market data update completed\n", datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
 
     except Exception as e:
-        print(f"  ERROR during market data update: {e}")
+        log.error("  ERROR during market data update: %s", e)
     finally:
         db.close()
 
 def run_scheduler():
-    """Run the market data update every 20 seconds."""
-    print("Starting Polymarket market data updater...")
-    print("Running initial update...")
-    update_all_market_data()
-
-    schedule.every(20).seconds.do(update_all_market_data)
-
-    print("Scheduler started. Updating market data every 20 seconds. Press Ctrl+C to stop.")
+    """Run the market data update every UPDATE_INTERVAL_SECONDS, start to start."""
+    log.info("Starting Polymarket market data updater...")
+    log.info("Updating market data every %d seconds. Press Ctrl+C to stop.", UPDATE_INTERVAL_SECONDS)
     while True:
-        schedule.run_pending()
-        time.sleep(1)
+        # Sleep once until the next deadline instead of polling a scheduler every second.
+        deadline = time.monotonic() + UPDATE_INTERVAL_SECONDS
+        update_all_market_data()
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        else:
+            log.warning("  Update overran the %ds interval by %.1fs", UPDATE_INTERVAL_SECONDS, -remaining)
+
+def configure_logging():
+    """Print log records from a background thread so fetch workers never block on stdout."""
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+    atexit.register(listener.stop)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[QueueHandler(log_queue)])
 
 if __name__ == "__main__":
+    configure_logging()
     run_scheduler()